@@ -0,0 +1,146 @@
+# absensi_anomaly.py
+# Deteksi anomali data absensi: hal-hal yang selama ini "ditebak" diam-diam
+# oleh pipeline (shift 8 jam bila cek in/out kosong, punch ganda digabung,
+# NIP yang tidak ada di master) dicatat sebagai flag per pekerja-hari / NIP.
+# Semua pemeriksaan memakai operasi array / groupby atas df_clean dan
+# final_result, tanpa loop per baris.
+import numpy as np
+import pandas as pd
+
+from absensi_master import normalize_id, normalize_name, master_index
+from absensi_core import as_category, canonical_names
+
+# batas durasi cek in -> cek out (jam) dan jarak punch beruntun (detik)
+MIN_SPAN_HOURS = 2
+MAX_SPAN_HOURS = 16
+BURST_SECONDS = 60
+
+# jenis anomali (urutan tampilan) -> arti / dampaknya ke hasil
+ANOMALY_TYPES = {
+    "Cek In kosong": "Shift ditebak dari Cek Out dikurangi 8 jam",
+    "Cek Out kosong": "Shift ditebak dari Cek In ditambah 8 jam",
+    "Tanpa Cek In/Out": "Ada punch tetapi arah (Lokasi ID) tidak dikenal; tanpa shift",
+    "Durasi terlalu pendek": f"Cek In sampai Cek Out kurang dari {MIN_SPAN_HOURS} jam",
+    "Durasi terlalu panjang": f"Cek In sampai Cek Out lebih dari {MAX_SPAN_HOURS} jam",
+    "Punch beruntun": f"Beberapa punch dalam {BURST_SECONDS} detik; hanya satu yang terpakai",
+    "Nama berbeda per NIP": "Rekap memakai ejaan nama yang paling sering muncul",
+    "NIP tidak ada di master": "Status kosong di rekap; Kegiatan hanya dari pencocokan nama",
+}
+ANOMALY_COLUMNS = ["Jenis", "NIP", "Nama", "Tanggal", "Keterangan"]
+
+def _flags(jenis, nip, nama, tanggal, keterangan):
+    # tanggal None = flag per NIP (Tanggal kosong)
+    n = len(nip)
+    if tanggal is None:
+        tanggal = np.full(n, np.datetime64("NaT", "ns"))
+    return pd.DataFrame({
+        "Jenis": np.full(n, jenis, dtype=object),
+        "NIP": np.asarray(nip, dtype=object),
+        "Nama": np.asarray(nama, dtype=object),
+        "Tanggal": np.asarray(tanggal, dtype="datetime64[ns]"),
+        "Keterangan": np.asarray(keterangan, dtype=object),
+    })
+
+def _span_flags(nip, nama, tanggal, din, dout, min_span_hours, max_span_hours):
+    both = ~np.isnan(din) & ~np.isnan(dout)
+    # cek out lebih awal dari cek in = melewati tengah malam (shift 3)
+    span = np.where(dout < din, dout + 86400, dout) - din
+    out = []
+    for jenis, mask in (
+        ("Durasi terlalu pendek", both & (span < min_span_hours * 3600)),
+        ("Durasi terlalu panjang", both & (span > max_span_hours * 3600)),
+    ):
+        idx = np.flatnonzero(mask)
+        jam = pd.Series(span[idx] / 3600).round(1).astype(str) + " jam"
+        out.append(_flags(jenis, nip[idx], nama[idx], tanggal[idx], jam.to_numpy()))
+    return out
+
+def _burst_flags(df_clean, burst_seconds):
+    # punch diurutkan per (ID, waktu); punch yang jaraknya < burst_seconds dari
+    # punch sebelumnya milik ID yang sama dihitung sebagai punch beruntun
+    id_codes, _ = pd.factorize(df_clean["ID"])
+    waktu = df_clean["Tanggal_Waktu"].to_numpy(dtype="datetime64[ns]").view("int64")
+    order = np.lexsort((waktu, id_codes))
+    ic, ts = id_codes[order], waktu[order]
+    burst = np.zeros(len(order), dtype=bool)
+    burst[1:] = (ic[1:] == ic[:-1]) & (np.diff(ts) < burst_seconds * 1_000_000_000)
+    rows = df_clean.iloc[order[burst]]
+    if rows.empty:
+        return _flags("Punch beruntun", [], [], [], [])
+    counts = (
+        pd.DataFrame({
+            "NIP": normalize_id(rows["ID"]).to_numpy(),
+            "Nama": normalize_name(rows["Nama"]).to_numpy(),
+            "Tanggal": rows["Tanggal"].to_numpy(),
+        })
+        .value_counts(sort=False).rename("Jumlah").reset_index()
+    )
+    keterangan = counts["Jumlah"].astype(str) + f" punch tambahan dalam {burst_seconds} detik"
+    return _flags("Punch beruntun", counts["NIP"], counts["Nama"], counts["Tanggal"], keterangan)
+
+def detect_anomalies(df_clean, final_result, master=None, min_span_hours=MIN_SPAN_HOURS,
+                     max_span_hours=MAX_SPAN_HOURS, burst_seconds=BURST_SECONDS):
+    """Flag anomali per pekerja-hari (Tanggal terisi) atau per NIP (Tanggal kosong).
+
+    ``df_clean`` = punch hasil clean_and_normalize (untuk punch beruntun; boleh
+    None), ``final_result`` = hasil process_absensi. Kolom: ANOMALY_COLUMNS.
+    """
+    # normalisasi sekali per nilai unik (categorical), bukan per baris
+    nip = as_category(final_result["ID"], normalize_id).to_numpy(dtype=object)
+    nama = as_category(final_result["Nama"], normalize_name).to_numpy(dtype=object)
+    tanggal = final_result["Tanggal"].to_numpy(dtype="datetime64[ns]")
+    din = final_result["Detik_In"].to_numpy(dtype="float64")
+    dout = final_result["Detik_Out"].to_numpy(dtype="float64")
+
+    parts = []
+    # 1) cek in / cek out kosong (shift disintesis 8 jam di encode_shifts_batch)
+    for jenis, mask in (
+        ("Cek In kosong", np.isnan(din) & ~np.isnan(dout)),
+        ("Cek Out kosong", ~np.isnan(din) & np.isnan(dout)),
+        ("Tanpa Cek In/Out", np.isnan(din) & np.isnan(dout)),
+    ):
+        idx = np.flatnonzero(mask)
+        parts.append(_flags(jenis, nip[idx], nama[idx], tanggal[idx], np.full(len(idx), ANOMALY_TYPES[jenis])))
+
+    # 2) durasi tidak wajar
+    parts.extend(_span_flags(nip, nama, tanggal, din, dout, min_span_hours, max_span_hours))
+
+    # 3) punch beruntun (digabung diam-diam di aggregate_cek_in_out)
+    if df_clean is not None and len(df_clean):
+        parts.append(_burst_flags(df_clean, burst_seconds))
+
+    # 4) satu NIP, beberapa ejaan nama (baris untuk ejaan selain nama utama)
+    utama, konflik = canonical_names(nip, nama)
+    lain = konflik[konflik["Nama"] != konflik["Nama_Utama"]]
+    parts.append(_flags(
+        "Nama berbeda per NIP", lain["NIP"], lain["Nama"], None,
+        "nama utama " + lain["Nama_Utama"].astype(str) + ", " + lain["Jumlah_Hari"].astype(str) + " hari",
+    ))
+
+    # 5) NIP yang tidak ada di master
+    master = master_index(master)
+    if master is not None:
+        hari = pd.Series(nip).value_counts(sort=False)
+        hilang = hari[~hari.index.isin(list(master.status_by_id))]
+        parts.append(_flags(
+            "NIP tidak ada di master", hilang.index, utama.reindex(hilang.index).to_numpy(),
+            None, hilang.astype(str).to_numpy() + " hari",
+        ))
+
+    flags = pd.concat(parts, ignore_index=True)
+    flags["Jenis"] = pd.Categorical(flags["Jenis"], categories=list(ANOMALY_TYPES))
+    return flags.sort_values(["Jenis", "NIP", "Tanggal"], kind="stable").reset_index(drop=True)
+
+def anomaly_summary(flags):
+    """Satu baris per jenis anomali: jumlah flag, jumlah NIP, dan artinya."""
+    grouped = flags.groupby("Jenis", observed=False)
+    summary = pd.DataFrame({
+        "Jumlah": grouped.size(),
+        "Jumlah NIP": grouped["NIP"].nunique(),
+    }).reindex(list(ANOMALY_TYPES), fill_value=0)
+    summary["Keterangan"] = list(ANOMALY_TYPES.values())
+    return summary.rename_axis("Jenis").reset_index()
+
+def anomalies_to_csv(flags):
+    out = flags.assign(Tanggal=flags["Tanggal"].dt.strftime("%d/%m/%Y").fillna(""))
+    return out.to_csv(index=False, sep=";")
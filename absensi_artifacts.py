@@ -0,0 +1,132 @@
+# absensi_artifacts.py
+# Cache artefak di disk (PDF harian, ZIP, rekap CSV) supaya hasil yang sama
+# tidak dirender ulang setelah server restart atau saat pengguna lain meng-
+# upload ekspor yang sama. Kunci = sidik jari isi data ternormalisasi + versi
+# master; satu file per artefak, ditulis atomik (file sementara + os.replace)
+# sehingga aman dipakai bersama oleh beberapa proses. Ukuran total dibatasi,
+# artefak yang paling lama tidak dipakai (mtime) dibuang lebih dulu.
+#
+#   ABSENSI_CACHE_DIR=absensi_cache   ABSENSI_CACHE_MAX_MB=512   (0 = mati)
+import os
+import time
+import hashlib
+import tempfile
+import threading
+import pandas as pd
+
+CACHE_DIR = os.environ.get("ABSENSI_CACHE_DIR", "absensi_cache")
+CACHE_MAX_BYTES = int(float(os.environ.get("ABSENSI_CACHE_MAX_MB", "512")) * 1024 * 1024)
+# file sementara sisa proses yang mati di tengah penulisan dibuang setelah ini
+TMP_MAX_AGE_SECONDS = 60 * 60
+TMP_PREFIX = ".tmp-"
+# naikkan bila format PDF / rekap berubah, supaya artefak lama tidak terpakai
+CACHE_VERSION = 1
+
+def frame_fingerprint(df):
+    """Sidik jari isi DataFrame (nilai + nama kolom, tanpa index)."""
+    h = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update("|".join(map(str, df.columns)).encode("utf-8"))
+    return h.hexdigest()
+
+class ArtifactCache:
+    """Cache bytes di folder ``directory`` dengan anggaran ``max_bytes`` (LRU via mtime).
+
+    Semua kesalahan I/O diabaikan: cache yang gagal berarti artefak dibuat ulang,
+    bukan halaman error.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key, ext):
+        name = hashlib.sha256(repr((CACHE_VERSION, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.{ext}")
+
+    def get(self, key, ext="bin"):
+        """Isi artefak untuk ``key`` atau None; artefak yang dipakai ditandai baru."""
+        if not self.enabled:
+            return None
+        path = self._path(key, ext)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data, ext="bin"):
+        if not self.enabled or data is None or len(data) > self.max_bytes:
+            return
+        path = self._path(key, ext)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data)
+            if self._size is None or self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # ukuran dihitung ulang dari folder (proses lain ikut menulis), lalu
+        # artefak dengan mtime terlama dihapus sampai di bawah anggaran
+        entries = []
+        now = time.time()
+        try:
+            with os.scandir(self.directory) as it:
+                for e in it:
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    if e.name.startswith(TMP_PREFIX):
+                        if now - st.st_mtime > TMP_MAX_AGE_SECONDS:
+                            self._remove(e.path)
+                        continue
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+        self._size = total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
+
+    def clear(self):
+        with self._lock:
+            max_bytes, self.max_bytes = self.max_bytes, 0
+            try:
+                self._evict()
+            finally:
+                self.max_bytes = max_bytes
+
+# satu cache per proses; folder yang sama dipakai bersama oleh worker process
+artifact_cache = ArtifactCache()
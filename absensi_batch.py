@@ -0,0 +1,216 @@
+# absensi_batch.py
+# Mode batch tanpa Streamlit: proses banyak file absensi sekaligus dan tulis
+# PDF harian, ZIP bulanan dan rekap CSV yang sama persis dengan unduhan di UI.
+#
+#   python absensi_batch.py data/*.csv --out hasil --workers 4
+#
+# Setiap file dibaca dan diproses di worker process, lalu dipecah per partisi
+# (bulan x site); tiap partisi (rekap + PDF) juga dikerjakan paralel. Hasil
+# ditulis ke <out>/<nama file tanpa ekstensi>/, satu subfolder per partisi
+# bila file berisi lebih dari satu bulan/site, plus ZIP gabungan.
+import os
+import io
+import sys
+import glob
+import time
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import absensi_core as core
+from absensi_pdf import build_monthly_zip, combine_zips
+from absensi_anomaly import detect_anomalies, anomalies_to_csv
+
+INPUT_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+def collect_inputs(paths):
+    """File, folder atau pola glob -> daftar file absensi (urut, tanpa duplikat)."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            matches = [os.path.join(p, f) for f in sorted(os.listdir(p))]
+        else:
+            matches = sorted(glob.glob(p)) or [p]
+        files.extend(f for f in matches if f.lower().endswith(INPUT_EXTENSIONS))
+    return list(dict.fromkeys(files))
+
+# MasterIndex per proses (proses utama dan tiap worker): {path: ((mtime, ukuran), index)}.
+# Dibaca sekali per worker lalu dipakai ulang oleh semua file/partisi berikutnya.
+_master_cache = {}
+
+def load_master(path):
+    """Path master -> MasterIndex (None bila path kosong); dimuat ulang hanya bila
+    file berubah. Dibaca dengan read_master_table, sama dengan upload master di UI."""
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if path == os.path.abspath(core.MASTER_PATH):
+        return core.master_store.get()
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _master_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "rb") as f:
+        master_df = core.read_master_table(f.read(), os.path.basename(path))
+    if master_df is None:
+        raise core.MasterDataError("Format master tidak didukung. Gunakan .csv .xlsx .xls")
+    index = core.MasterIndex(core.normalize_master(master_df))
+    _master_cache[path] = (stamp, index)
+    return index
+
+ZIP_NAME = "rekap_absensi_bulanan.zip"
+
+def prepare_file(path, master_path, out_root):
+    """Baca + proses satu file absensi, lalu pecah per partisi. Dijalankan di worker process."""
+    started = time.perf_counter()
+    out_dir = os.path.join(out_root, os.path.splitext(os.path.basename(path))[0])
+    os.makedirs(out_dir, exist_ok=True)
+
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    df_clean = core.load_absensi(file_bytes, os.path.basename(path))
+    if "Nama" not in df_clean.columns or "Tanggal_Waktu" not in df_clean.columns:
+        raise core.FileAbsensiError("Format file absensi tidak sesuai. Pastikan kolom Nama dan Tanggal/Waktu tersedia.")
+
+    master = load_master(master_path)
+    final_result = core.process_absensi(df_clean, master)
+
+    # NIP dengan ejaan nama berbeda (sama dengan peringatan di UI)
+    konflik_nama = core.name_conflicts(final_result)
+    if not konflik_nama.empty:
+        konflik_nama.to_csv(os.path.join(out_dir, "konflik_nama.csv"), index=False, sep=";", encoding="utf-8")
+    # nama yang dicocokkan fuzzy ke master, untuk ditinjau
+    cocok_nama = core.name_matches(final_result, master)
+    if not cocok_nama.empty:
+        cocok_nama.to_csv(os.path.join(out_dir, "cocok_nama.csv"), index=False, sep=";", encoding="utf-8")
+    # cek in/out kosong, durasi tidak wajar, punch beruntun, NIP di luar master
+    anomali = detect_anomalies(df_clean, final_result, master)
+    if not anomali.empty:
+        with open(os.path.join(out_dir, "anomali.csv"), "w", encoding="utf-8", newline="") as f:
+            f.write(anomalies_to_csv(anomali))
+
+    return {
+        "file": path,
+        "out_dir": out_dir,
+        "punches": len(df_clean),
+        # tanpa tanggal valid tetap satu partisi (ZIP kosong, tanpa rekap)
+        "partisi": core.split_partitions(final_result) or [("", final_result)],
+        "konflik_nama": konflik_nama["NIP"].nunique(),
+        "cocok_nama": len(cocok_nama),
+        "anomali": len(anomali),
+        "seconds": time.perf_counter() - started,
+    }
+
+def process_partition(final_result, folder, master_path, out_dir, renderer=None):
+    """Satu partisi -> PDF harian + rekap CSV di <out_dir>/<folder>/ (folder ""
+    = langsung di out_dir). Dijalankan di worker process."""
+    started = time.perf_counter()
+    part_dir = os.path.join(out_dir, folder)
+    os.makedirs(part_dir, exist_ok=True)
+
+    # PDF harian + ZIP bulanan (render serial: paralelisme ada di level partisi)
+    zip_bytes = build_monthly_zip(final_result, renderer=renderer, parallel=False)
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        zf.extractall(part_dir)
+        n_pdf = len(zf.namelist())
+
+    rekap_name = None
+    # rekap CSV dari cache artefak disk bila data + master sama dengan run sebelumnya
+    rekap_csv, month_start = core.rekap_csv_cached(final_result, load_master(master_path))
+    if rekap_csv is not None:
+        rekap_name = core.rekap_filename(month_start)
+        with open(os.path.join(part_dir, rekap_name), "w", encoding="utf-8", newline="") as f:
+            f.write(rekap_csv)
+
+    return {
+        "folder": folder,
+        "zip": zip_bytes,
+        "pdf": n_pdf,
+        "rekap_name": rekap_name,
+        "rekap_csv": rekap_csv,
+        "seconds": time.perf_counter() - started,
+    }
+
+def write_combined_zip(out_dir, parts):
+    """ZIP di <out_dir>: satu partisi = PDF saja (seperti unduhan UI), beberapa
+    partisi = satu folder per partisi berisi PDF harian + rekap CSV."""
+    if len(parts) == 1 and not parts[0]["folder"]:
+        zip_bytes = parts[0]["zip"]
+    else:
+        parts = sorted(parts, key=lambda p: p["folder"])
+        zip_bytes = combine_zips(
+            [(p["folder"], p["zip"]) for p in parts],
+            {f"{p['folder']}/{p['rekap_name']}": p["rekap_csv"] for p in parts if p["rekap_name"]},
+        )
+    with open(os.path.join(out_dir, ZIP_NAME), "wb") as f:
+        f.write(zip_bytes)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proses file absensi tanpa UI Streamlit.")
+    parser.add_argument("inputs", nargs="+", help="file, folder atau pola glob (.csv / .xlsx / .xls)")
+    parser.add_argument("--master", default=core.MASTER_PATH, help="master data (default: %(default)s); kosongkan untuk tanpa master")
+    parser.add_argument("--out", default="output", help="folder output (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="jumlah worker process (default: jumlah CPU)")
+    parser.add_argument("--renderer", choices=["platypus", "canvas"], default=None, help="renderer PDF (default: ABSENSI_PDF_RENDERER / platypus)")
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        parser.error("tidak ada file absensi (.csv / .xlsx / .xls) yang ditemukan")
+    master_path = args.master or None
+    # validasi master sekali di awal agar kesalahan tidak muncul per file
+    try:
+        load_master(master_path)
+    except Exception as e:
+        print(f"Gagal membaca master data {master_path}: {e}", file=sys.stderr)
+        return 2
+
+    failed = 0
+    # worker tidak dibatasi jumlah file: satu file bisa berisi banyak partisi
+    workers = max(1, args.workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(prepare_file, f, master_path, args.out): f for f in files}
+        part_futures = {}
+        for fut in as_completed(futures):
+            try:
+                r = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"GAGAL  {futures[fut]}: {e}", file=sys.stderr)
+                continue
+            # partisi dikirim ke pool begitu file selesai dipecah
+            partisi = r.pop("partisi")
+            r.update(parts=[], pending=len(partisi), error=None)
+            flat = len(partisi) == 1
+            for label, part in partisi:
+                folder = "" if flat else label
+                part_futures[pool.submit(process_partition, part, folder, master_path,
+                                         r["out_dir"], args.renderer)] = (r, label)
+        for fut in as_completed(part_futures):
+            r, label = part_futures[fut]
+            try:
+                r["parts"].append(fut.result())
+            except Exception as e:
+                r["error"] = r["error"] or f"partisi {label}: {e}"
+            r["pending"] -= 1
+            if r["pending"]:
+                continue
+            if r["error"]:
+                failed += 1
+                print(f"GAGAL  {r['file']}: {r['error']}", file=sys.stderr)
+                continue
+            write_combined_zip(r["out_dir"], r["parts"])
+            n_pdf = sum(p["pdf"] for p in r["parts"])
+            seconds = r["seconds"] + sum(p["seconds"] for p in r["parts"])
+            print(f"OK     {r['file']} -> {r['out_dir']} "
+                  f"({r['punches']} baris, {n_pdf} PDF"
+                  + (f", {len(r['parts'])} partisi" if len(r["parts"]) > 1 else "")
+                  + f", {seconds:.1f} s)"
+                  + (f", {r['konflik_nama']} NIP dengan nama berbeda" if r["konflik_nama"] else "")
+                  + (f", {r['cocok_nama']} nama dicocokkan ke master" if r["cocok_nama"] else "")
+                  + (f", {r['anomali']} anomali" if r["anomali"] else ""))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
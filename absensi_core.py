@@ -0,0 +1,614 @@
+# absensi_core.py
+# Inti pemrosesan absensi tanpa UI: baca file, normalisasi, Cek_In/Cek_Out,
+# shift, master data dan rekap bulanan. Dipakai oleh BIP.py (Streamlit) dan
+# absensi_batch.py (command line) sehingga keduanya menghasilkan output yang sama.
+import io
+import re
+import csv
+import hashlib
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from datetime import datetime
+from absensi_excel import read_excel_columns
+from absensi_diag import stage
+from absensi_artifacts import artifact_cache, frame_fingerprint
+
+# nama master data diekspor ulang agar BIP.py / absensi_batch.py cukup import absensi_core
+from absensi_master import (  # noqa: F401
+    MASTER_PATH, MasterDataError, MasterIndex, MasterStore, master_store, master_index, pick_master_columns,
+    read_default_master, normalize_master, master_version, normalize_id, normalize_name,
+)
+
+# ======================
+# UTILS
+# ======================
+DATETIME_FORMATS = [
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%y %H:%M:%S", "%d/%m/%y %H:%M",
+    "%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M",
+    "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%Y-%m-%d"
+]
+
+def parse_datetime_flexible(val):
+    if pd.isna(val):
+        return pd.NaT
+    val = str(val).strip()
+    if not val:
+        return pd.NaT
+    if " " in val:
+        date_part, time_part = val.split(" ", 1)
+        time_part = time_part.replace(".", ":")
+        val = f"{date_part} {time_part}"
+    else:
+        val = val.replace(".", "-")
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(val, fmt)
+        except:
+            continue
+    return pd.to_datetime(val, errors="coerce", dayfirst=True)
+
+def _normalize_datetime_text(s):
+    # versi vektor dari pembersihan string di parse_datetime_flexible;
+    # hanya string yang mengandung titik yang berubah
+    dotted = s.str.contains(".", regex=False)
+    if not dotted.any():
+        return s
+    d = s[dotted]
+    parts = d.str.partition(" ")
+    has_time = parts[1] != ""
+    with_time = parts[0] + " " + parts[2].str.replace(".", ":", regex=False)
+    date_only = d.str.replace(".", "-", regex=False)
+    s = s.copy()
+    s[dotted] = with_time.where(has_time, date_only)
+    return s
+
+def _match_datetime_format(val):
+    for fmt in DATETIME_FORMATS:
+        try:
+            datetime.strptime(val, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+def detect_datetime_format(normalized, sample_size=500):
+    # format dominan dari sampel; urutan DATETIME_FORMATS sama dengan parser referensi
+    matched = [_match_datetime_format(v) for v in normalized.iloc[:sample_size]]
+    counts = pd.Series(matched, dtype=object).value_counts()
+    return counts.index[0] if not counts.empty else None
+
+def parse_datetime_series(values):
+    """Parse satu kolom tanggal/waktu sekaligus.
+
+    Hasil sama dengan ``values.apply(parse_datetime_flexible)``: tiap string unik
+    diparse sekali dengan format dominan, baris yang gagal diparse ulang lewat
+    parse_datetime_flexible.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    mask = values.notna()
+    text = values[mask].astype(str).str.strip()
+    codes, uniques = pd.factorize(text)
+    uniques = pd.Series(uniques, dtype=object)
+
+    normalized = _normalize_datetime_text(uniques)
+    fmt = detect_datetime_format(normalized)
+    if fmt:
+        parsed = pd.to_datetime(normalized, format=fmt, errors="coerce")
+    else:
+        parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+
+    failed = parsed.isna() & (uniques != "")
+    if failed.any():
+        parsed = parsed.astype(object)
+        fallback = [parse_datetime_flexible(v) for v in uniques[failed]]
+        # offset zona waktu dibuang supaya kolom tetap satu dtype
+        parsed[failed] = [v.replace(tzinfo=None) if getattr(v, "tzinfo", None) else v for v in fallback]
+        parsed = pd.to_datetime(parsed)
+
+    out = pd.Series(pd.NaT, index=values.index, dtype=parsed.dtype)
+    out[mask] = parsed.to_numpy()[codes]
+    return out
+
+# header file absensi -> nama kolom standar
+COLUMN_ALIASES = {
+    "No.ID": "ID", "No ID": "ID", "No. ID": "ID", "NIP": "ID", "No": "ID", "NO": "ID",
+    "Tgl/Waktu": "Tanggal_Waktu", "Tgl / Waktu": "Tanggal_Waktu", "Tanggal": "Tanggal_Waktu", "TANGGAL": "Tanggal_Waktu", "Waktu": "Tanggal_Waktu", 
+    "WAKTU": "Tanggal_Waktu",
+    "Lokasi ID": "Lokasi_ID", "Lokasi": "Lokasi_ID", "LokasiID": "Lokasi_ID",
+    "Karyawan": "Nama", "KARYAWAN": "Nama", "NAMA": "Nama",
+    # Lokasi_ID adalah arah punch (masuk/keluar); pabrik/site ada di kolom terpisah
+    "SITE": "Site", "Plant": "Site", "PLANT": "Site",
+    "Cabang": "Site", "CABANG": "Site",
+}
+# satu-satunya kolom yang dipakai clean_and_normalize (Site opsional, untuk partisi)
+ABSENSI_COLUMNS = ["Nama", "ID", "Tanggal_Waktu", "Lokasi_ID", "Site"]
+
+def as_category(values, func=None):
+    """Series -> categorical (kategori terurut). ``func`` diterapkan sekali per
+    kategori unik, bukan per baris; kategori yang menjadi sama digabung."""
+    values = pd.Series(values)
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    if func is None:
+        return values
+    codes, uniques = pd.factorize(func(pd.Series(values.cat.categories)), sort=True)
+    old = values.cat.codes.to_numpy()
+    new = np.where(old >= 0, codes[old], -1)
+    return pd.Series(pd.Categorical.from_codes(new, uniques), index=values.index, name=values.name)
+
+def clean_and_normalize(df):
+    """Data absensi mentah -> satu baris per punch dengan tipe ringkas.
+
+    Nama/ID categorical, Tanggal datetime64 (tengah malam), Detik int32 detik
+    sejak tengah malam. Teks tampilan (tanggal, jam) baru dibuat di PDF/CSV/grafik.
+    """
+    # basic column cleanup + mapping
+    df.columns = [str(c).strip() for c in df.columns]
+    rename_map = COLUMN_ALIASES
+    df.rename(columns={k:v for k,v in rename_map.items() if k in df.columns}, inplace=True)
+
+    possible_cols = ABSENSI_COLUMNS
+    existing = [c for c in possible_cols if c in df.columns]
+    df = df[existing].copy()
+
+    if "Tanggal_Waktu" in df.columns:
+        with stage("parse_datetime", rows_in=len(df)):
+            df["Tanggal_Waktu"] = parse_datetime_series(df["Tanggal_Waktu"])
+        df["Tanggal"] = df["Tanggal_Waktu"].dt.normalize()
+    # teks berulang -> categorical; strip cukup sekali per nilai unik
+    if "Nama" in df.columns:
+        df["Nama"] = as_category(df["Nama"].astype(str), lambda c: c.str.strip())
+    if "ID" in df.columns:
+        df["ID"] = as_category(df["ID"].astype(str), lambda c: c.str.strip())
+    if "Site" in df.columns:
+        # site kosong tetap satu kelompok ("") agar tidak hilang saat groupby
+        df["Site"] = as_category(df["Site"].fillna("").astype(str), lambda c: c.str.strip())
+    # drop rows without Nama or Tanggal_Waktu
+    df = df.dropna(subset=["Nama", "Tanggal_Waktu"], how="any")
+    if "Tanggal_Waktu" in df.columns:
+        # detik sejak tengah malam, untuk agregasi cek in/out secara numerik
+        df["Detik"] = ((df["Tanggal_Waktu"] - df["Tanggal"]) // pd.Timedelta(seconds=1)).astype("int32")
+    return df
+
+def aggregate_cek_in_out(df_clean):
+    """Detik_In (masuk paling awal) dan Detik_Out (keluar paling akhir) per ID/Nama/Tanggal
+    (dan Site bila ada).
+
+    Lokasi_ID 2 = masuk, 1 = keluar; dibandingkan secara numerik sehingga
+    ekspor yang menyimpan Lokasi_ID sebagai teks tetap terbaca. Tanpa
+    Lokasi_ID, semua punch dihitung sebagai masuk dan keluar.
+    """
+    detik = df_clean["Detik"].to_numpy(dtype="float64")
+    if "Lokasi_ID" in df_clean.columns:
+        lokasi = pd.to_numeric(df_clean["Lokasi_ID"], errors="coerce").to_numpy()
+        detik_in = np.where(lokasi == 2, detik, np.nan)
+        detik_out = np.where(lokasi == 1, detik, np.nan)
+    else:
+        detik_in = detik_out = detik
+
+    group_cols = ["ID", "Nama", "Tanggal"] + (["Site"] if "Site" in df_clean.columns else [])
+    keys = df_clean[group_cols].assign(Detik_In=detik_in, Detik_Out=detik_out)
+    result = keys.groupby(group_cols, observed=True).agg(
+        Detik_In=("Detik_In", "min"),
+        Detik_Out=("Detik_Out", "max"),
+    ).reset_index()
+    # jam cek in/out tetap detik (float32, NaN bila tidak ada); teks jam dibuat di PDF
+    result[["Detik_In", "Detik_Out"]] = result[["Detik_In", "Detik_Out"]].astype("float32")
+    return result
+
+# jendela shift dalam detik sejak 00:00 tanggal absensi (shift 3 melewati tengah malam)
+SHIFT_WINDOWS = np.array([[7, 15], [15, 23], [23, 31]]) * 3600
+SHIFT_MIDPOINTS = SHIFT_WINDOWS.mean(axis=1)
+
+def encode_shifts_batch(in_sec, out_sec, shift_hours=8, tolerance_minutes=60):
+    """Shift1..Shift3 untuk seluruh baris sekaligus.
+
+    ``in_sec``/``out_sec`` berisi detik sejak 00:00 tanggal absensi (NaN bila
+    kosong). Mengembalikan array float (n, 3); baris tanpa cek in dan cek out
+    bernilai NaN.
+    """
+    in_sec = np.asarray(in_sec, dtype="float64")
+    out_sec = np.asarray(out_sec, dtype="float64")
+    has_in = ~np.isnan(in_sec)
+    has_out = ~np.isnan(out_sec)
+    shift_sec = shift_hours * 3600
+
+    start = np.where(has_in, in_sec, out_sec - shift_sec)
+    end = np.where(has_out, out_sec, in_sec + shift_sec)
+    end = np.where(end < start, end + 86400, end)
+
+    # overlap dengan ketiga jendela shift dalam satu broadcast
+    latest_start = np.maximum(start[:, None], SHIFT_WINDOWS[:, 0])
+    earliest_end = np.minimum(end[:, None], SHIFT_WINDOWS[:, 1])
+    shifts = (earliest_end - latest_start >= tolerance_minutes * 60).astype("float64")
+
+    # tidak overlap sama sekali -> shift dengan titik tengah terdekat
+    none_hit = ~shifts.any(axis=1)
+    nearest = np.abs(start[:, None] - SHIFT_MIDPOINTS).argmin(axis=1)
+    rows = np.flatnonzero(none_hit)
+    shifts[rows, nearest[rows]] = 1.0
+
+    # hanya cek out sebelum 07:00 -> shift 3
+    early_out = ~has_in & has_out & (out_sec < SHIFT_WINDOWS[0, 0])
+    shifts[early_out] = [0.0, 0.0, 1.0]
+
+    shifts[~has_in & ~has_out] = np.nan
+    return shifts
+
+# ======================
+# BACA FILE
+# ======================
+CSV_DELIMITERS = ";,|\t"
+CSV_SNIFF_BYTES = 64 * 1024
+# jumlah baris per chunk saat membaca CSV absensi besar
+CSV_CHUNK_ROWS = 200_000
+
+READ_ERROR = "Gagal membaca file absensi. Silakan buka di Excel → Save As → Excel Workbook (.xlsx) lalu upload kembali."
+
+def sniff_delimiter(sample):
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        # deteksi gagal: pilih ; (umum di Indonesia) kecuali header jelas memakai ,
+        header = sample.split("\n", 1)[0]
+        return "," if header.count(",") > header.count(";") else ";"
+
+def read_any_csv(uploaded_file):
+    # delimiter dideteksi sekali dari sampel, lalu satu kali baca dengan engine C
+    sample = uploaded_file.read(CSV_SNIFF_BYTES).decode("utf-8", errors="ignore")
+    uploaded_file.seek(0)
+    return pd.read_csv(uploaded_file, sep=sniff_delimiter(sample.lstrip("\ufeff")))
+
+def resolve_columns(header):
+    """Header file -> {header asli (strip): kolom standar} untuk kolom yang dipakai saja.
+
+    Alias sama dengan COLUMN_ALIASES di clean_and_normalize; bila dua header
+    menunjuk kolom yang sama, yang pertama dipakai.
+    """
+    columns = {}
+    for col in header:
+        col = str(col).strip()
+        target = COLUMN_ALIASES.get(col, col)
+        if target in ABSENSI_COLUMNS and target not in columns.values():
+            columns[col] = target
+    return columns
+
+def pick_absensi_columns(header):
+    # untuk read_excel_columns: {indeks kolom: kolom standar}, kosong bila bukan header
+    columns = resolve_columns(header)
+    if not {"Nama", "Tanggal_Waktu"} <= set(columns.values()):
+        return {}
+    stripped = [str(h).strip() for h in header]
+    return {stripped.index(col): target for col, target in columns.items()}
+
+class FileAbsensiError(Exception):
+    """File absensi tidak bisa dibaca (format tidak didukung / isi rusak)."""
+
+def iter_absensi_csv(file_bytes, chunksize=None):
+    """Chunk DataFrame berisi kolom standar saja (teks), atau None bila header
+    tidak memuat Nama dan Tanggal_Waktu (file dibaca utuh lewat jalur lama).
+
+    ``chunksize`` default CSV_CHUNK_ROWS (dibaca saat dipanggil).
+    """
+    chunksize = chunksize or CSV_CHUNK_ROWS
+    sample = file_bytes[:CSV_SNIFF_BYTES].decode("utf-8", errors="ignore").lstrip("\ufeff")
+    sep = sniff_delimiter(sample)
+    header = next(csv.reader(io.StringIO(sample), delimiter=sep), [])
+    columns = resolve_columns(header)
+    if not {"Nama", "Tanggal_Waktu"} <= set(columns.values()):
+        return None
+
+    def chunks():
+        try:
+            reader = pd.read_csv(
+                io.BytesIO(file_bytes), sep=sep, dtype=str, chunksize=chunksize,
+                usecols=lambda c: str(c).strip() in columns,
+            )
+            for chunk in reader:
+                chunk.columns = [columns[str(c).strip()] for c in chunk.columns]
+                yield chunk
+        except Exception as e:
+            raise FileAbsensiError(READ_ERROR) from e
+    return chunks()
+
+def read_table(buf, fname):
+    # .csv / .xlsx / .xls; None bila ekstensi tidak didukung
+    fname = fname.lower()
+    if fname.endswith(".csv"):
+        return read_any_csv(buf)
+    elif fname.endswith(".xlsx"):
+        return pd.read_excel(buf, engine="openpyxl")
+    elif fname.endswith(".xls"):
+        return pd.read_excel(buf, engine="xlrd")
+    return None
+
+def read_master_table(file_bytes, fname):
+    """File master upload -> DataFrame lengkap (semua kolom, karena disimpan utuh oleh
+    MasterStore.save); Excel lewat jalur cepat bila header ketemu."""
+    df = read_excel_columns(file_bytes, fname, pick_master_columns)
+    if df is None:
+        df = read_table(io.BytesIO(file_bytes), fname)
+    return df
+
+def read_absensi(file_bytes, fname):
+    try:
+        df_raw = read_table(io.BytesIO(file_bytes), fname)
+    except Exception as e:
+        raise FileAbsensiError(READ_ERROR) from e
+    if df_raw is None:
+        raise FileAbsensiError("Format file tidak didukung")
+    return df_raw
+
+def _read_stage(read, *args):
+    with stage("read") as st:
+        df_raw = read(*args)
+        st.rows_out = None if df_raw is None else len(df_raw)
+    return df_raw
+
+def _clean_stage(df_raw):
+    with stage("clean", rows_in=len(df_raw)) as st:
+        df = clean_and_normalize(df_raw)
+        st.rows_out = len(df)
+    return df
+
+def load_absensi(file_bytes, fname):
+    """Baca file absensi lalu clean_and_normalize.
+
+    CSV dibaca per chunk (hanya 4 kolom yang dipakai, engine C) dan tiap chunk
+    langsung dinormalisasi, jadi memori puncak tidak ikut membesar dengan
+    jumlah kolom/ukuran file mentah. Excel lewat read_excel_columns.
+    """
+    if fname.lower().endswith((".xlsx", ".xls")):
+        # Excel: stream baris read-only, hanya 4 kolom yang dipakai
+        try:
+            df_raw = _read_stage(read_excel_columns, file_bytes, fname, pick_absensi_columns)
+        except Exception as e:
+            raise FileAbsensiError(READ_ERROR) from e
+        if df_raw is None:
+            df_raw = _read_stage(read_absensi, file_bytes, fname)
+        return _clean_stage(df_raw)
+    chunks = iter_absensi_csv(file_bytes) if fname.lower().endswith(".csv") else None
+    if chunks is None:
+        return _clean_stage(_read_stage(read_absensi, file_bytes, fname))
+    # chunk berikutnya dibaca di dalam tahap "read", dibersihkan di tahap "clean"
+    parts = []
+    while True:
+        chunk = _read_stage(next, chunks, None)
+        if chunk is None:
+            break
+        parts.append(_clean_stage(chunk))
+    if not parts:
+        return _clean_stage(_read_stage(read_absensi, file_bytes, fname))
+    return concat_chunks(parts)
+
+def concat_chunks(parts):
+    """Gabung chunk hasil clean_and_normalize tanpa kehilangan kolom categorical.
+
+    Tiap chunk punya kategori sendiri; pd.concat biasa akan mengubah kolom
+    seperti Nama/ID kembali menjadi teks, jadi kategorinya disatukan dulu.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    df = pd.concat(parts)
+    for col in parts[0].columns:
+        if all(isinstance(p[col].dtype, pd.CategoricalDtype) for p in parts):
+            # kategori terurut, sama seperti as_category; kategori dibangun ulang
+            # sebagai satu array supaya tidak menyimpan potongan buffer per chunk
+            merged = union_categoricals([p[col] for p in parts], sort_categories=True)
+            df[col] = pd.Categorical.from_codes(merged.codes, pd.Index(merged.categories.tolist()))
+    return df
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+# ======================
+# PROSES UTAMA
+# ======================
+def process_absensi(df_clean, master):
+    """Detik_In/Detik_Out per ID/Nama/Tanggal, Kegiatan dari master, dan flag shift.
+
+    ``master`` boleh None, DataFrame hasil normalize_master, atau MasterIndex.
+    """
+    # tentukan Cek_In / Cek_Out berdasarkan Lokasi_ID bila ada
+    with stage("cek_in_out", rows_in=len(df_clean)) as st:
+        result = aggregate_cek_in_out(df_clean)
+        st.rows_out = len(result)
+    with stage("master_merge", rows_in=len(result)):
+        final_result = merge_kegiatan(result, master)
+
+    # encode shifts
+    with stage("encode_shifts", rows_in=len(final_result)):
+        final_result[["Shift1","Shift2","Shift3"]] = encode_shifts_batch(
+            final_result["Detik_In"], final_result["Detik_Out"], shift_hours=8
+        )
+    return final_result
+
+def merge_kegiatan(result, master):
+    """Tambahkan kolom Kegiatan dari master (dicocokkan lewat nama huruf besar)."""
+    # standar nama di result supaya matching master by name works
+    result["Nama"] = as_category(result["Nama"], normalize_name)
+
+    master = master_index(master)
+    final_result = result.copy()
+    if master is not None:
+        # lookup dict per pasangan ID/nama unik; nama kembar di master dibedakan lewat ID
+        pairs = pd.MultiIndex.from_frame(final_result[["ID", "Nama"]])
+        uniq = pairs.unique()
+        kegiatan = master.kegiatan_for(pd.Series(uniq.get_level_values(0)).astype(str),
+                                       pd.Series(uniq.get_level_values(1)).astype(str))
+        final_result["Kegiatan"] = as_category(kegiatan.to_numpy()[uniq.get_indexer(pairs)])
+    else:
+        final_result["Kegiatan"] = pd.NA
+    return final_result
+
+def canonical_names(ids, names):
+    """Nama utama per NIP: ejaan yang paling sering muncul (seri: yang muncul duluan).
+
+    Mengembalikan (Series nama utama berindeks ID, DataFrame konflik) dengan
+    konflik = satu baris per ejaan untuk NIP yang punya lebih dari satu ejaan.
+    """
+    counts = (
+        pd.DataFrame({"ID": np.asarray(ids), "Nama": np.asarray(names)})
+        .groupby(["ID", "Nama"], sort=False).size().reset_index(name="Jumlah_Hari")
+        .sort_values("Jumlah_Hari", ascending=False, kind="stable")
+    )
+    utama = counts.drop_duplicates("ID").set_index("ID")["Nama"]
+    konflik = counts[counts["ID"].duplicated(keep=False)]
+    konflik = (
+        konflik.assign(Nama_Utama=konflik["ID"].map(utama).to_numpy())
+        .sort_values(["ID", "Jumlah_Hari"], ascending=[True, False], kind="stable")
+        .rename(columns={"ID": "NIP"})[["NIP", "Nama_Utama", "Nama", "Jumlah_Hari"]]
+        .reset_index(drop=True)
+    )
+    return utama, konflik
+
+def name_conflicts(final_result):
+    """NIP dengan ejaan nama berbeda di final_result (untuk diperbaiki di sumber data)."""
+    return canonical_names(normalize_id(final_result["ID"]), normalize_name(final_result["Nama"]))[1]
+
+def name_matches(final_result, master):
+    """Nama absen yang dicocokkan fuzzy ke master, untuk ditinjau.
+
+    Kolom ID, Nama, Nama_Master, Skor, Kegiatan, Jumlah_Hari (kosong bila semua
+    nama cocok persis atau tanpa master).
+    """
+    master = master_index(master)
+    columns = ["ID", "Nama", "Nama_Master", "Skor", "Kegiatan", "Jumlah_Hari"]
+    if master is None or final_result.empty:
+        return pd.DataFrame(columns=columns)
+    names = normalize_name(final_result["Nama"])
+    _, matches = master.resolve_names(final_result["ID"], names)
+    if matches.empty:
+        return pd.DataFrame(columns=columns)
+    hari = (
+        pd.DataFrame({"ID": normalize_id(final_result["ID"]).to_numpy(), "Nama": names.to_numpy()})
+        .value_counts().rename("Jumlah_Hari").reset_index()
+    )
+    matches = matches.assign(Kegiatan=master.kegiatan_for(matches["ID"], matches["Nama_Master"]).to_numpy())
+    return matches.merge(hari, on=["ID", "Nama"], how="left").sort_values(["Skor", "Nama"])[columns].reset_index(drop=True)
+
+# ======================
+# PARTISI (BULAN x SITE)
+# ======================
+def partition_label(bulan, site=""):
+    # "2024-01" atau "2024-01_PLANT_A": aman dipakai sebagai nama folder/file
+    site = re.sub(r"[^\w.-]+", "_", str(site)).strip("_")
+    return f"{bulan}_{site}" if site else str(bulan)
+
+def split_partitions(final_result):
+    """final_result -> [(label, bagian)] per (bulan, Site), urut label.
+
+    Tiap bagian diproses sendiri (rekap, PDF, dashboard), jadi ekspor lintas
+    bulan atau beberapa pabrik tidak lagi tercampur dalam satu rekap.
+    """
+    keys = [pd.to_datetime(final_result["Tanggal"]).dt.to_period("M").rename("Bulan")]
+    if "Site" in final_result.columns:
+        keys.append(final_result["Site"])
+    parts = []
+    for key, part in final_result.groupby(keys, observed=True, sort=True):
+        bulan, site = (key + ("",))[:2]
+        parts.append((partition_label(bulan, site), part.reset_index(drop=True)))
+    return parts
+
+def build_rekap(final_result, master):
+    """Rekap kehadiran bulanan per NIP (kolom = tanggal, bool). Mengembalikan (rekap, awal_bulan)."""
+    final_result = final_result.copy()
+    final_result["Tanggal"] = pd.to_datetime(final_result["Tanggal"])
+    master = master_index(master)
+
+    # --- Tentukan apakah data harian atau bulanan ---
+    first_date = final_result["Tanggal"].min()
+
+    if pd.isna(first_date):
+        return None, None
+
+    # Siapkan bulan untuk nama file (wajib ada)
+    month_start = first_date.replace(day=1)
+    month_end = (first_date + pd.offsets.MonthEnd(0)).normalize()
+    # satu rekap = satu bulan; data lintas bulan dipecah dulu lewat split_partitions
+    final_result = final_result[final_result["Tanggal"] <= month_end]
+
+    # Jika data hanya berisi satu hari (absensi harian)
+    if final_result["Tanggal"].dt.normalize().nunique() == 1:
+        # Hanya pakai hari yang muncul agar tidak error
+        day_cols = sorted(final_result["Tanggal"].dt.day.unique().tolist())
+    else:
+        # Data bulanan → buat daftar semua hari dalam bulan
+        month_days = pd.date_range(month_start, month_end)
+        day_cols = [d.day for d in month_days]
+
+
+    # hadir = ada shift terisi; baris di luar hari rekap diabaikan
+    hadir = final_result[["Shift1", "Shift2", "Shift3"]].fillna(0).to_numpy().sum(axis=1) > 0
+    day = final_result["Tanggal"].dt.day.to_numpy()
+    day_pos = pd.Index(day_cols).get_indexer(day)
+
+    # normalize ID types for safe merge with master by ID
+    ids = normalize_id(final_result["ID"])
+    id_codes, id_uniques = pd.factorize(ids)
+
+    # === Gabungkan nama berbeda tapi NIP sama: satu baris per NIP ===
+    nama_utama, _ = canonical_names(ids, normalize_name(final_result["Nama"]))
+    nama = nama_utama.reindex(id_uniques)
+
+    # Kegiatan: gabungan unik terurut per NIP (urutan dari sort, dipertahankan groupby)
+    keg = pd.DataFrame({"kode": id_codes, "Kegiatan": final_result["Kegiatan"].astype(object).fillna("").to_numpy()})
+    keg = keg.drop_duplicates().sort_values("Kegiatan", kind="stable")
+    kegiatan = keg.groupby("kode")["Kegiatan"].agg(", ".join).reindex(range(len(id_uniques)), fill_value="")
+
+    # Status dari master lewat indeks ID (ID master sudah dinormalisasi sama)
+    status = master.status_for(pd.Series(id_uniques)).to_numpy() if master is not None else ""
+
+    # === Matriks kehadiran NIP x hari (bool) ===
+    presence = np.zeros((len(id_uniques), len(day_cols)), dtype=bool)
+    sel = hadir & (day_pos >= 0)
+    presence[id_codes[sel], day_pos[sel]] = True
+
+    rekap = pd.DataFrame({
+        "ID": id_uniques,
+        "Nama": nama.to_numpy(),
+        "Kegiatan": kegiatan.to_numpy(),
+        "Status": status,
+    })
+    rekap = pd.concat([rekap, pd.DataFrame(presence, columns=day_cols)], axis=1)
+    rekap["Total"] = presence.sum(axis=1)
+    rekap = rekap.sort_values(["Nama", "ID"]).reset_index(drop=True)
+
+    # rename ID -> NIP; kolom hari tetap bool, simbol diberikan di rekap_to_csv
+    rekap.rename(columns={"ID": "NIP"}, inplace=True)
+    return rekap, month_start
+
+def rekap_csv_cached(final_result, master):
+    """(teks rekap CSV, awal bulan) satu partisi, lewat cache artefak di disk.
+
+    Kunci = sidik jari final_result + versi master; (None, None) bila tanpa tanggal.
+    """
+    master = master_index(master)
+    key = ("rekap", frame_fingerprint(final_result), master.version if master is not None else master_version(None))
+    data = artifact_cache.get(key, ext="csv")
+    if data is not None:
+        # awal bulan sama dengan build_rekap: tanggal pertama, hari ke-1
+        return data.decode("utf-8"), pd.to_datetime(final_result["Tanggal"]).min().replace(day=1)
+    rekap, month_start = build_rekap(final_result, master)
+    if rekap is None:
+        return None, None
+    csv_text = rekap_to_csv(rekap)
+    artifact_cache.put(key, csv_text.encode("utf-8"), ext="csv")
+    return csv_text, month_start
+
+def rekap_filename(month_start):
+    return f"rekap_absensi_{month_start.strftime('%Y_%m')}.csv"
+
+def rekap_to_csv(rekap):
+    rekap_csv = rekap.copy()
+    # kolom hari (bool) -> "v" / kosong
+    day_cols = rekap_csv.columns[(rekap_csv.dtypes == bool).to_numpy()]
+    rekap_csv[day_cols] = np.where(rekap_csv[day_cols].to_numpy(), "v", "")
+    rekap_csv["Nama"] = rekap_csv["Nama"].astype(str).str.title()
+
+    # save to buffer
+    csv_buf = io.StringIO()
+    rekap_csv.to_csv(csv_buf, index=False, sep=";", encoding="utf-8-sig")
+    return csv_buf.getvalue()
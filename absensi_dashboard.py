@@ -0,0 +1,144 @@
+# absensi_dashboard.py
+# Kubus agregat untuk dashboard: satu kali agregasi final_result menjadi sel
+# (Tanggal x Kegiatan x Status) berisi jumlah shift dan bitmap pekerja. Semua
+# grafik dan filter dihitung dari kubus ini, bukan dari punch mentah. Jumlah
+# karyawan unik lintas sel dihitung dengan OR bitmap, jadi tetap tepat.
+import hashlib
+import numpy as np
+import pandas as pd
+
+from absensi_master import normalize_id, master_index
+
+SHIFT_COLUMNS = ["Shift1", "Shift2", "Shift3"]
+
+def _fingerprint(cells, workers):
+    h = hashlib.sha256(pd.util.hash_pandas_object(cells, index=False).to_numpy().tobytes())
+    h.update(workers.tobytes())
+    return h.hexdigest()
+
+class DashboardCube:
+    """Sel Tanggal x Kegiatan x Status dengan Shift1..3 (jumlah) dan Jumlah
+    Karyawan, plus ``workers``: bitmap pekerja per sel (np.packbits)."""
+
+    def __init__(self, cells, workers, fingerprint=None):
+        self.cells = cells.reset_index(drop=True)
+        self.workers = workers
+        self.fingerprint = fingerprint or _fingerprint(self.cells, workers)
+
+    @classmethod
+    def build(cls, final_result, master):
+        """Satu kali agregasi final_result; Status dari master per ID (seperti rekap)."""
+        master = master_index(master)
+        id_codes, id_uniques = pd.factorize(normalize_id(final_result["ID"]))
+        status = master.status_for(pd.Series(id_uniques)).to_numpy(dtype=object) if master is not None \
+            else np.full(len(id_uniques), "", dtype=object)
+
+        t_codes, t_uniq = pd.factorize(pd.to_datetime(final_result["Tanggal"]), sort=True)
+        # Kegiatan kosong (tidak ada di master) tetap dihitung di grafik per tanggal
+        k_codes, k_uniq = pd.factorize(final_result["Kegiatan"].astype(object), sort=True)
+        k_codes = np.where(k_codes < 0, len(k_uniq), k_codes)
+        k_labels = np.append(np.asarray(k_uniq, dtype=object), None)
+        s_codes, s_uniq = pd.factorize(status[id_codes], sort=True)
+
+        # kode sel terurut (Tanggal, Kegiatan, Status)
+        combined = (t_codes * len(k_labels) + k_codes) * max(len(s_uniq), 1) + s_codes
+        cell, cell_keys = pd.factorize(combined, sort=True)
+        s_key = cell_keys % max(len(s_uniq), 1)
+        k_key = cell_keys // max(len(s_uniq), 1) % len(k_labels)
+        t_key = cell_keys // max(len(s_uniq), 1) // len(k_labels)
+
+        cells = pd.DataFrame({
+            "Tanggal": t_uniq[t_key],
+            "Kegiatan": k_labels[k_key],
+            "Status": np.asarray(s_uniq, dtype=object)[s_key],
+        })
+        for col in SHIFT_COLUMNS:
+            shift = final_result[col].to_numpy(dtype="float64")
+            cells[col] = np.bincount(cell, weights=np.nan_to_num(shift), minlength=len(cell_keys))
+
+        bits = np.zeros((len(cell_keys), len(id_uniques)), dtype=bool)
+        bits[cell, id_codes] = True
+        cells["Jumlah Karyawan"] = bits.sum(axis=1)
+        return cls(cells, np.packbits(bits, axis=1))
+
+    def slice(self, kegiatan=(), status=(), start=None, end=None):
+        """Kubus bagian: filter kosong = semua; start/end inklusif."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        if kegiatan:
+            mask &= self.cells["Kegiatan"].isin(kegiatan).to_numpy()
+        if status:
+            mask &= self.cells["Status"].isin(status).to_numpy()
+        if start is not None:
+            mask &= (self.cells["Tanggal"] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.cells["Tanggal"] <= pd.Timestamp(end)).to_numpy()
+        if mask.all():
+            return self
+        return DashboardCube(self.cells[mask], self.workers[mask])
+
+    def options(self, col):
+        return sorted(self.cells[col].dropna().unique())
+
+    def unique_workers(self, by):
+        """Jumlah karyawan unik per nilai ``by`` (OR bitmap sel), nilai kosong dilewati."""
+        codes, labels = pd.factorize(self.cells[by], sort=True)
+        idx = np.flatnonzero(codes >= 0)
+        idx = idx[np.argsort(codes[idx], kind="stable")]
+        if len(idx) == 0:
+            return pd.DataFrame({by: pd.Series(dtype=self.cells[by].dtype), "Jumlah Karyawan": pd.Series(dtype="int64")})
+        c = codes[idx]
+        starts = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+        merged = np.bitwise_or.reduceat(self.workers[idx], starts, axis=0)
+        return pd.DataFrame({
+            by: labels[c[starts]],
+            "Jumlah Karyawan": np.unpackbits(merged, axis=1).sum(axis=1),
+        })
+
+    def shift_totals(self):
+        totals = self.cells[SHIFT_COLUMNS].sum().reset_index()
+        totals.columns = ["Shift", "Jumlah"]
+        totals["Shift"] = totals["Shift"].str.replace("Shift", "Shift ")
+        return totals
+
+# ======================
+# GRAFIK
+# ======================
+def dashboard_figures(cube):
+    """Empat grafik dashboard dari kubus: {nama: plotly Figure}."""
+    # plotly baru dimuat saat dashboard pertama kali dirender
+    import plotly.express as px
+
+    # 1) line: jumlah karyawan unik per tanggal
+    df_line = cube.unique_workers("Tanggal")
+    df_line["Hari"] = df_line["Tanggal"].dt.day
+    bulan_nama = df_line["Tanggal"].iloc[0].strftime("%B %Y") if len(df_line) else ""
+    fig_line = px.line(
+        df_line,
+        x="Hari",
+        y="Jumlah Karyawan",
+        markers=True,
+        title=f"Jumlah Karyawan Bulan {bulan_nama}"
+    )
+    fig_line.update_layout(
+        xaxis=dict(
+            tickmode="linear",
+            dtick=1,
+            title="Tanggal"
+        ),
+        yaxis_title="Jumlah Karyawan"
+    )
+
+    # 2) bar kegiatan
+    df_kegiatan = cube.unique_workers("Kegiatan").sort_values("Jumlah Karyawan", ascending=False)
+    fig_bar_kegiatan = px.bar(df_kegiatan, x="Kegiatan", y="Jumlah Karyawan", text="Jumlah Karyawan", title="Jumlah Karyawan per Kegiatan")
+    fig_bar_kegiatan.update_traces(textposition="outside")
+
+    # 3) status horizontal bar (Status dari master per NIP, sama dengan rekap)
+    df_status = cube.unique_workers("Status").sort_values("Jumlah Karyawan", ascending=True)
+    fig_bar_status = px.bar(df_status, x="Jumlah Karyawan", y="Status", orientation="h", text="Jumlah Karyawan", title="Jumlah Karyawan per Status")
+    fig_bar_status.update_traces(textposition="outside")
+
+    # 4) pie shift
+    fig_pie = px.pie(cube.shift_totals(), names="Shift", values="Jumlah", title="Distribusi Jumlah Karyawan per Shift", hole=0.3)
+
+    return {"line": fig_line, "kegiatan": fig_bar_kegiatan, "status": fig_bar_status, "shift": fig_pie}
@@ -0,0 +1,229 @@
+# absensi_diag.py
+# Instrumentasi ringan per tahap pipeline: waktu, jumlah baris masuk/keluar dan
+# puncak memori (RSS yang dicuplik) tiap tahap. Satu Diagnostics per run
+# (disimpan di contextvar, jadi sesi Streamlit yang berjalan bersamaan tidak
+# tercampur). Tanpa run aktif atau dengan ABSENSI_DIAGNOSTICS=0, stage() hanya
+# mengembalikan objek kosong dan RSS tidak dicuplik.
+#
+#   ABSENSI_PROFILE=profil.prof streamlit run BIP.py
+#       -> cProfile job pipeline upload pertama; berikutnya lewat tombol di
+#          panel Diagnostics. File ditimpa oleh setiap run yang diprofil
+import io
+import os
+import json
+import time
+import cProfile
+import pstats
+import threading
+import contextvars
+from datetime import datetime
+
+DIAG_ENABLED = os.environ.get("ABSENSI_DIAGNOSTICS", "1") != "0"
+PROFILE_PATH = os.environ.get("ABSENSI_PROFILE") or None
+PROFILE_TOP = 25
+
+_current = contextvars.ContextVar("absensi_diag", default=None)
+
+# RSS proses dicuplik tiap RSS_SAMPLE_SECONDS selama ada tahap terbuka; puncak
+# cuplikan diteruskan ke semua tahap terbuka (semua thread). tracemalloc tidak
+# dipakai: memperlambat pipeline ~3x dan tidak melihat buffer Arrow.
+RSS_SAMPLE_SECONDS = 0.005
+
+def rss_bytes():
+    """RSS proses saat ini dalam byte (None bila /proc tidak tersedia, mis. Windows/macOS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+_open_stages = []
+_open_lock = threading.Lock()
+_sampler = None
+
+def _sample():
+    """Cuplik RSS dan naikkan puncak tahap terbuka. Dipanggil dengan _open_lock dipegang."""
+    rss = rss_bytes()
+    if rss is not None:
+        for st in _open_stages:
+            st.peak = max(st.peak, rss)
+    return rss
+
+def _sampler_loop():
+    global _sampler
+    while True:
+        time.sleep(RSS_SAMPLE_SECONDS)
+        with _open_lock:
+            if not _open_stages:
+                _sampler = None
+                return
+            _sample()
+
+def _open_stage(st):
+    global _sampler
+    with _open_lock:
+        st.base = st.peak = rss_bytes()
+        if st.base is None:
+            return
+        _open_stages.append(st)
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sampler_loop, name="absensi-diag-rss", daemon=True)
+            _sampler.start()
+
+def _close_stage(st):
+    """Puncak RSS selama tahap dalam byte, di atas RSS saat tahap dimulai (None bila tidak diukur)."""
+    if st.base is None:
+        return None
+    with _open_lock:
+        _sample()
+        _open_stages.remove(st)
+    return st.peak - st.base
+
+class Stage:
+    """Satu tahap yang sedang diukur; isi rows_out / cache sebelum blok selesai."""
+
+    def __init__(self, diag, name, rows_in):
+        self.diag = diag
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.cache = None
+
+    def __enter__(self):
+        self.diag._stack.append(self.name)
+        self.path = "/".join(self.diag._stack)
+        _open_stage(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        peak = _close_stage(self)
+        self.diag._stack.pop()
+        self.diag._record(self, seconds, peak, failed=exc_type is not None)
+        return False
+
+class _NullStage:
+    rows_out = None
+    cache = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_STAGE = _NullStage()
+
+class Diagnostics:
+    """Catatan tahap untuk satu run; tahap bersarang ditulis "induk/anak",
+    tahap dengan nama sama (mis. per chunk CSV) dijumlahkan."""
+
+    def __init__(self):
+        self.started = datetime.now()
+        self.stages = {}
+        self._stack = []
+        self.profile_text = None
+
+    def stage(self, name, rows_in=None):
+        return Stage(self, name, rows_in)
+
+    def _record(self, st, seconds, peak, failed):
+        rec = self.stages.get(st.path)
+        if rec is None:
+            rec = self.stages[st.path] = {"stage": st.path, "calls": 0, "seconds": 0.0,
+                                          "rows_in": None, "rows_out": None, "cache": None,
+                                          "peak_mb": None, "failed": False}
+        rec["calls"] += 1
+        rec["seconds"] += seconds
+        if st.rows_in is not None:
+            rec["rows_in"] = (rec["rows_in"] or 0) + int(st.rows_in)
+        if st.rows_out is not None:
+            rec["rows_out"] = (rec["rows_out"] or 0) + int(st.rows_out)
+        if st.cache is not None:
+            rec["cache"] = st.cache
+        if peak is not None:
+            # tahap berulang (mis. per chunk): puncak terbesar, bukan jumlah
+            rec["peak_mb"] = max(rec["peak_mb"] or 0.0, round(peak / (1024 * 1024), 1))
+        rec["failed"] = rec["failed"] or failed
+
+    def merge(self, other, prefix, cache=None):
+        """Salin catatan Diagnostics lain (mis. job latar belakang) sebagai "prefix/tahap",
+        beserta ringkasan cProfile-nya bila ada."""
+        if other.profile_text:
+            self.profile_text = other.profile_text
+        for path, rec in other.stages.items():
+            rec = dict(rec, stage=f"{prefix}/{path}")
+            if cache is not None:
+                rec["cache"] = cache
+            self.stages[rec["stage"]] = rec
+
+    def records(self):
+        return [dict(r, seconds=round(r["seconds"], 4)) for r in self.stages.values()]
+
+    def to_json(self):
+        return json.dumps({
+            "started": self.started.isoformat(timespec="seconds"),
+            "stages": self.records(),
+            "profile": self.profile_text,
+        }, indent=2)
+
+def start():
+    """Mulai catatan baru untuk run ini (None bila diagnostik dimatikan)."""
+    diag = Diagnostics() if DIAG_ENABLED else None
+    _current.set(diag)
+    return diag
+
+def current():
+    return _current.get()
+
+def stage(name, rows_in=None):
+    """Context manager pengukur satu tahap; tanpa run aktif tidak mengukur apa pun."""
+    diag = _current.get()
+    if diag is None:
+        return NULL_STAGE
+    return diag.stage(name, rows_in)
+
+_profile_pending = PROFILE_PATH is not None
+_profile_lock = threading.Lock()
+
+def take_profile_request():
+    """True sekali per proses bila ABSENSI_PROFILE diisi: job upload pertama diprofil
+    tanpa menunggu tombol di panel Diagnostics."""
+    global _profile_pending
+    with _profile_lock:
+        pending, _profile_pending = _profile_pending, False
+    return pending
+
+class profile_run:
+    """cProfile satu run bila ABSENSI_PROFILE diisi dan ``enabled``; statistik
+    ditulis ke file tersebut (menimpa isi lama) dan ringkasannya disimpan di
+    Diagnostics aktif.
+
+    cProfile hanya memprofil thread yang memanggil enable(), jadi blok ini
+    harus membungkus pekerjaannya di thread yang sama (lihat JobRunner._run).
+    """
+
+    def __init__(self, path=None, enabled=True):
+        self.path = (path or PROFILE_PATH) if enabled else None
+        self.profiler = None
+
+    def __enter__(self):
+        if self.path:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler is None:
+            return False
+        self.profiler.disable()
+        self.profiler.dump_stats(self.path)
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        diag = _current.get()
+        if diag is not None:
+            diag.profile_text = out.getvalue()
+        self.profiler = None
+        return False
@@ -0,0 +1,100 @@
+# absensi_employee.py
+# Indeks per karyawan: final_result diurutkan sekali per (NIP, Tanggal) dan
+# setiap NIP cukup menyimpan offset awal/akhir barisnya. Pencarian NIP / awal
+# nama memakai array terurut + searchsorted, jadi satu query tidak pernah
+# memfilter seluruh final_result.
+import numpy as np
+import pandas as pd
+
+from absensi_master import normalize_id, normalize_name
+from absensi_core import canonical_names
+from absensi_pdf import jam_text
+
+SHIFT_COLUMNS = ["Shift1", "Shift2", "Shift3"]
+# batas hasil pencarian yang ditampilkan
+SEARCH_LIMIT = 50
+
+def _prefix_range(sorted_values, prefix):
+    # rentang [awal, akhir) nilai berawalan ``prefix`` di array teks terurut
+    lo = np.searchsorted(sorted_values, prefix, side="left")
+    hi = np.searchsorted(sorted_values, prefix + "\uffff", side="left")
+    return lo, hi
+
+class EmployeeIndex:
+    """NIP -> baris pekerja-hari (offset di frame terurut NIP, Tanggal)."""
+
+    def __init__(self, final_result):
+        ids = normalize_id(final_result["ID"]).to_numpy(dtype=object)
+        names = normalize_name(final_result["Nama"]).to_numpy(dtype=object)
+        order = np.lexsort((pd.to_datetime(final_result["Tanggal"]).to_numpy(), ids.astype(str)))
+        cols = [c for c in ["Tanggal", "Nama", "Kegiatan", "Detik_In", "Detik_Out"] + SHIFT_COLUMNS
+                if c in final_result.columns]
+        self.frame = final_result[cols].iloc[order].reset_index(drop=True)
+
+        # offset baris per NIP (NIP terurut sebagai teks)
+        sorted_ids = ids[order].astype(str)
+        self.nips, self.starts = np.unique(sorted_ids, return_index=True)
+        self.ends = np.append(self.starts[1:], len(sorted_ids))
+
+        # nama utama per NIP + semua ejaan untuk pencarian awal nama
+        utama, _ = canonical_names(ids, names)
+        self.nama_utama = utama.reindex(self.nips).fillna("").to_numpy(dtype=object)
+        pairs = pd.DataFrame({"Nama": names.astype(str), "NIP": ids.astype(str)}).drop_duplicates()
+        pairs = pairs.sort_values(["Nama", "NIP"], kind="stable")
+        self.name_keys = pairs["Nama"].to_numpy(dtype=str)
+        self.name_nips = pairs["NIP"].to_numpy(dtype=str)
+
+    def __len__(self):
+        return len(self.nips)
+
+    def _position(self, nip):
+        i = np.searchsorted(self.nips, nip)
+        return i if i < len(self.nips) and self.nips[i] == nip else None
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """NIP yang cocok dengan awal NIP atau awal nama (tidak peka huruf besar/kecil).
+
+        Mengembalikan DataFrame NIP, Nama (nama utama), NIP persis di urutan pertama.
+        """
+        query = str(query).strip()
+        if not query:
+            return pd.DataFrame(columns=["NIP", "Nama"])
+        found = []
+        lo, hi = _prefix_range(self.nips, normalize_id(pd.Series([query])).iloc[0])
+        found.extend(self.nips[lo:min(hi, lo + limit)])
+        lo, hi = _prefix_range(self.name_keys, query.upper())
+        found.extend(self.name_nips[lo:min(hi, lo + limit)])
+        found = list(dict.fromkeys(found))[:limit]
+        pos = [self._position(n) for n in found]
+        return pd.DataFrame({"NIP": found, "Nama": [self.nama_utama[p] for p in pos]})
+
+    def rows(self, nip):
+        """Baris pekerja-hari satu NIP (urut tanggal) tanpa memfilter seluruh data."""
+        i = self._position(str(nip))
+        if i is None:
+            return self.frame.iloc[:0]
+        return self.frame.iloc[self.starts[i]:self.ends[i]]
+
+    def name_of(self, nip):
+        i = self._position(str(nip))
+        return "" if i is None else self.nama_utama[i]
+
+    def table(self, nip):
+        """Tabel tampilan: Tanggal, Kegiatan, Cek In/Out (HH:MM:SS), Shift 1-3."""
+        rows = self.rows(nip)
+        out = pd.DataFrame({"Tanggal": pd.to_datetime(rows["Tanggal"]).dt.date.to_numpy()})
+        if "Kegiatan" in rows.columns:
+            out["Kegiatan"] = rows["Kegiatan"].astype(object).fillna("").to_numpy()
+        out["Cek In"] = jam_text(rows["Detik_In"])
+        out["Cek Out"] = jam_text(rows["Detik_Out"])
+        for col in SHIFT_COLUMNS:
+            out[col.replace("Shift", "Shift ")] = rows[col].fillna(0).astype(int).to_numpy()
+        return out
+
+    def totals(self, nip):
+        """Hari hadir (ada shift terisi) dan jumlah per shift untuk satu NIP."""
+        shifts = self.rows(nip)[SHIFT_COLUMNS].fillna(0).to_numpy()
+        totals = {"Hari Hadir": int((shifts.sum(axis=1) > 0).sum())}
+        for i, col in enumerate(SHIFT_COLUMNS):
+            totals[col.replace("Shift", "Shift ")] = int(shifts[:, i].sum())
+        return totals
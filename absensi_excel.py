@@ -0,0 +1,117 @@
+# absensi_excel.py
+# Pembacaan Excel cepat: baris di-stream (openpyxl read_only / xlrd per kolom),
+# header dicari di beberapa baris pertama, dan hanya kolom yang dipakai yang
+# diambil. Tanpa style, tanpa evaluasi formula (nilai tersimpan saja).
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# baris awal yang diperiksa untuk mencari header (judul laporan dll dilewati)
+HEADER_SCAN_ROWS = 20
+
+
+def _cell_value(val):
+    # sama dengan konversi pandas.read_excel: angka bulat -> int, kosong -> NaN
+    if val is None or (isinstance(val, str) and val.strip() == ""):
+        return np.nan
+    if isinstance(val, float) and val.is_integer():
+        return int(val)
+    return val
+
+
+def _is_blank(val):
+    return isinstance(val, float) and np.isnan(val)
+
+
+def _frame(header_names, columns):
+    # baris kosong di akhir sheet dipotong sebelum dtype ditebak (seperti
+    # read_excel), supaya kolom ID tidak menjadi float karenanya
+    n = len(columns[0]) if columns else 0
+    while n and all(_is_blank(col[n - 1]) for col in columns):
+        n -= 1
+    # pd.Series menebak dtype per kolom seperti read_excel (int / float / datetime / teks)
+    df = pd.DataFrame({name: pd.Series(values[:n]) for name, values in zip(header_names, columns)})
+    # baris kosong di tengah ikut dibuang, dtype tetap seperti read_excel
+    return df.dropna(how="all").reset_index(drop=True)
+
+
+def find_header(rows, pick_columns):
+    """(indeks baris header, {indeks kolom: nama}) dari baris-baris awal, atau None."""
+    for r, row in enumerate(rows):
+        picked = pick_columns([("" if v is None else str(v)) for v in row])
+        if picked:
+            return r, picked
+    return None
+
+
+def read_xlsx_columns(file_bytes, pick_columns):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        head = list(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True))
+        found = find_header(head, pick_columns)
+        if found is None:
+            return None
+        header_row, picked = found
+        idx = list(picked)
+        columns = [[] for _ in idx]
+
+        def take(row):
+            for out, i in zip(columns, idx):
+                out.append(_cell_value(row[i]) if i < len(row) else np.nan)
+
+        for row in head[header_row + 1:]:
+            take(row)
+        # sisa sheet: sel di kanan kolom terakhir yang dipakai tidak dibuat
+        for row in ws.iter_rows(min_row=len(head) + 1, max_col=max(idx) + 1, values_only=True):
+            take(row)
+    finally:
+        wb.close()
+    return _frame(picked.values(), columns)
+
+
+def read_xls_columns(file_bytes, pick_columns):
+    import xlrd
+
+    book = xlrd.open_workbook(file_contents=file_bytes, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        head = [sheet.row_values(r) for r in range(min(HEADER_SCAN_ROWS, sheet.nrows))]
+        found = find_header(head, pick_columns)
+        if found is None:
+            return None
+        header_row, picked = found
+        columns = []
+        for i in picked:
+            values = sheet.col_values(i, start_rowx=header_row + 1)
+            types = sheet.col_types(i, start_rowx=header_row + 1)
+            col = []
+            for v, t in zip(values, types):
+                if t == xlrd.XL_CELL_DATE:
+                    col.append(datetime(*xlrd.xldate_as_tuple(v, book.datemode)))
+                elif t in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                    col.append(np.nan)
+                else:
+                    col.append(_cell_value(v))
+            columns.append(col)
+    finally:
+        book.release_resources()
+    return _frame(picked.values(), columns)
+
+
+def read_excel_columns(file_bytes, fname, pick_columns):
+    """DataFrame berisi kolom pilihan saja, atau None (bukan Excel / header tidak ketemu).
+
+    ``pick_columns(header)`` menerima daftar teks satu baris dan mengembalikan
+    {indeks kolom: nama kolom hasil} bila baris itu header, selain itu {}.
+    """
+    fname = fname.lower()
+    if fname.endswith(".xlsx"):
+        return read_xlsx_columns(file_bytes, pick_columns)
+    if fname.endswith(".xls"):
+        return read_xls_columns(file_bytes, pick_columns)
+    return None
@@ -0,0 +1,218 @@
+# absensi_jobs.py
+# Job latar belakang untuk upload besar: pipeline (baca, shift, rekap) dan ZIP
+# PDF dijalankan di thread pool terbatas, bukan di thread sesi Streamlit.
+# Halaman cukup memantau Job (tahap + progres) lalu memakai hasilnya; job
+# dengan kunci sama (isi upload + versi master) dipakai ulang oleh rerun
+# berikutnya maupun sesi lain tanpa dihitung ulang.
+#
+#   ABSENSI_MAX_JOBS=2       -> jumlah job yang boleh berjalan bersamaan
+#   ABSENSI_JOB_TTL_MIN=30   -> job selesai dibuang setelah sekian menit
+import os
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import absensi_diag
+import absensi_core as core
+from absensi_store import punch_store
+from absensi_pdf import PDF_RENDERER, build_monthly_zip, combine_zips
+from absensi_artifacts import artifact_cache, frame_fingerprint
+from absensi_anomaly import detect_anomalies
+
+MAX_JOBS = max(1, int(os.environ.get("ABSENSI_MAX_JOBS", "2")))
+# job selesai yang disimpan untuk dipakai ulang (yang paling lama dibuang);
+# hasilnya (DataFrame / ZIP) tetap di memori sampai kedaluwarsa
+JOB_KEEP = 16
+JOB_TTL = timedelta(minutes=float(os.environ.get("ABSENSI_JOB_TTL_MIN", "30")))
+
+class Job:
+    """Satu pekerjaan latar belakang; state "antri" / "jalan" / "selesai" / "gagal"."""
+
+    def __init__(self, key, seq, profile=False):
+        self.key = key
+        self.seq = seq
+        self.profile = profile
+        self.state = "antri"
+        self.stage = None
+        self.fraction = 0.0
+        self.result = None
+        self.error = None
+        self.diag = None
+        self.submitted = datetime.now()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.state in ("selesai", "gagal")
+
+    def snapshot(self):
+        with self._lock:
+            return self.state, self.stage, self.fraction
+
+    def progress(self, done, total):
+        # dipakai sebagai callback progress(selesai, total) di build_monthly_zip
+        with self._lock:
+            self.fraction = done / total if total else 1.0
+
+    @contextmanager
+    def step(self, name):
+        """Tandai tahap yang sedang berjalan (juga dicatat di Diagnostics job)."""
+        with self._lock:
+            self.stage, self.fraction = name, 0.0
+        with absensi_diag.stage(name) as stg:
+            yield stg
+
+class JobRunner:
+    """Thread pool dengan batas job bersamaan dan daftar job per kunci."""
+
+    def __init__(self, max_workers=MAX_JOBS, keep=JOB_KEEP, ttl=JOB_TTL):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="absensi-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self.keep = keep
+        self.ttl = ttl
+
+    def submit(self, key, fn, *args, profile=False):
+        """Job untuk ``key``: yang sudah ada dipakai ulang, selain itu ``fn(job, *args)``
+        dijadwalkan di pool. Job yang gagal tidak dipakai ulang: submit berikutnya
+        (rerun / klik ulang) mencobanya lagi. ``profile`` menjalankan job baru di
+        bawah cProfile (ABSENSI_PROFILE)."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state != "gagal":
+                self._jobs.move_to_end(key)
+                return job
+            job = self._jobs[key] = Job(key, next(self._seq), profile)
+            self._prune()
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def resubmit(self, key, fn, *args, profile=False):
+        """Seperti submit, tetapi job lama untuk ``key`` dibuang lebih dulu."""
+        with self._lock:
+            self._jobs.pop(key, None)
+        return self.submit(key, fn, *args, profile=profile)
+
+    def get(self, key):
+        with self._lock:
+            self._prune()
+            return self._jobs.get(key)
+
+    def queue_position(self, job):
+        """Jumlah job antri di depan ``job`` (0 bila sedang/sudah berjalan)."""
+        if job.state != "antri":
+            return 0
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.state == "antri" and j.seq < job.seq)
+
+    def _prune(self):
+        # job selesai dibuang bila kedaluwarsa atau melebihi ``keep`` (yang terlama dulu)
+        batas = datetime.now() - self.ttl
+        finished = [(k, j.finished) for k, j in self._jobs.items() if j.done]
+        lebih = len(finished) - self.keep
+        for i, (k, selesai) in enumerate(finished):
+            # finished bisa belum terisi sesaat setelah state berubah
+            if i < lebih or (selesai is not None and selesai < batas):
+                del self._jobs[k]
+
+    def _run(self, job, fn, args):
+        job.state = "jalan"
+        job.diag = absensi_diag.start()
+        try:
+            # profiler dibuat di thread pekerja: cProfile hanya melihat thread pemanggil enable()
+            with absensi_diag.profile_run(enabled=job.profile):
+                job.result = fn(job, *args)
+            job.state = "selesai"
+        except Exception as e:
+            job.error = e
+            job.state = "gagal"
+        finally:
+            job.finished = datetime.now()
+
+# satu runner untuk semua sesi dalam proses Streamlit ini
+job_runner = JobRunner()
+
+# ======================
+# PEKERJAAN
+# ======================
+def process_upload(job, upload_hash, fname, file_bytes, master, use_arsip):
+    """Upload absensi -> final_result, flag anomali, partisi dan rekap CSV per partisi."""
+    with job.step("parsing") as stg:
+        df_clean = core.load_absensi(file_bytes, fname)
+        stg.rows_out = len(df_clean)
+        if "Nama" not in df_clean.columns or "Tanggal_Waktu" not in df_clean.columns:
+            raise core.FileAbsensiError("❌ Format file absensi tidak sesuai. Pastikan kolom Nama dan Tanggal/Waktu tersedia.\n\nPastikan Format Data Sesuai.")
+        if df_clean.empty:
+            raise core.FileAbsensiError("❌ File absensi setelah pembersihan menghasilkan data kosong. Pastikan file benar.")
+
+    arsip = revision = None
+    with job.step("shifts") as stg:
+        if use_arsip:
+            # hanya pekerja-hari yang tersentuh upload ini yang dihitung ulang
+            arsip = punch_store.append(df_clean, upload_hash)
+            # semua bulan yang tersentuh upload ini (partisi dipecah di tahap rekap)
+            bulan = arsip["bulan"]
+            revision = punch_store.revision()
+            final_result = punch_store.month_result(bulan, master)
+            data_key = f"arsip:{','.join(bulan)}:{revision}"
+        else:
+            final_result = core.process_absensi(df_clean, master)
+            data_key = upload_hash
+        stg.rows_out = len(final_result)
+
+    with job.step("anomalies") as stg:
+        # mode arsip: punch beruntun hanya dari punch upload ini
+        anomali = detect_anomalies(df_clean, final_result, master)
+        stg.rows_out = len(anomali)
+
+    with job.step("rekap"):
+        partisi = core.split_partitions(final_result)
+        rekap = {}
+        for i, (label, part) in enumerate(partisi):
+            # (teks CSV, awal bulan); dari cache disk bila data + master sama
+            rekap[label] = core.rekap_csv_cached(part, master)
+            job.progress(i + 1, len(partisi))
+
+    return {
+        "final_result": final_result,
+        "data_key": data_key,
+        "anomali": anomali,
+        "partisi": partisi,
+        "rekap": rekap,
+        "arsip": arsip,
+        "revision": revision,
+    }
+
+def build_zip(job, parts, rekap=None, master_ver=None):
+    """ZIP PDF harian. ``parts`` = [(folder, final_result)]; satu partisi dengan
+    folder "" menghasilkan ZIP bulanan biasa, selain itu ZIP gabungan per folder
+    plus rekap CSV dari ``rekap`` {folder: (teks CSV, awal_bulan)}.
+
+    ZIP jadi disimpan di cache artefak disk (kunci = isi tiap partisi + versi master).
+    """
+    key = ("zip", PDF_RENDERER, master_ver, bool(rekap),
+           tuple((folder, frame_fingerprint(part)) for folder, part in parts))
+    data = artifact_cache.get(key, ext="zip")
+    if data is not None:
+        return data
+    with job.step("pdf"):
+        zips = []
+        for i, (folder, part) in enumerate(parts):
+            zips.append((folder, build_monthly_zip(
+                part, progress=lambda done, total, i=i: job.progress(i * total + done, len(parts) * total)
+            )))
+    if len(zips) == 1 and not zips[0][0]:
+        data = zips[0][1]
+    else:
+        rekap_files = {}
+        for folder, (rekap_csv, month_part) in (rekap or {}).items():
+            if rekap_csv is not None:
+                rekap_files[f"{folder}/{core.rekap_filename(month_part)}"] = rekap_csv
+        data = combine_zips(zips, rekap_files)
+    artifact_cache.put(key, data, ext="zip")
+    return data
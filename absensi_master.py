@@ -0,0 +1,306 @@
+# absensi_master.py
+# Master data (ID, Nama, Status, Kegiatan) bersama untuk semua sesi dalam satu
+# proses. Dibaca dan dinormalisasi sekali per versi file, lengkap dengan indeks
+# hash per ID dan per nama supaya Kegiatan/Status cukup dicari lewat dict.
+import os
+import re
+import hashlib
+import tempfile
+import threading
+from difflib import SequenceMatcher
+import numpy as np
+import pandas as pd
+
+MASTER_PATH = "MasterData.csv"
+
+class MasterDataError(Exception):
+    """Master data tidak memiliki kolom wajib."""
+
+def read_default_master(path=MASTER_PATH):
+    return pd.read_csv(path, delimiter=";")
+
+def master_version(master_df):
+    if master_df is None:
+        return "tanpa-master"
+    hashed = pd.util.hash_pandas_object(master_df, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+def normalize_id(values):
+    # "123.0" / " 123" -> "123", sama untuk data absensi dan master
+    return values.astype(str).str.replace(r"\.0$", "", regex=True).str.strip()
+
+def normalize_name(values):
+    return values.astype(str).str.strip().str.upper()
+
+def pick_master_columns(header):
+    # untuk read_excel_columns: baris header dikenali dari kolom ID/NIP + NAMA, lalu
+    # SEMUA kolom diambil (nama seperti read_excel) karena MasterStore.save menyimpan
+    # master apa adanya; kolom lain milik HR tidak boleh hilang
+    names = {h.strip().upper() for h in header}
+    if "NAMA" not in names or not names & {"ID", "NIP"}:
+        return {}
+    last = max(i for i, h in enumerate(header) if h.strip())
+    picked, seen = {}, {}
+    for i, h in enumerate(header[:last + 1]):
+        h = h if h.strip() else f"Unnamed: {i}"
+        n = seen[h] = seen.get(h, -1) + 1
+        picked[i] = f"{h}.{n}" if n else h
+    return picked
+
+# ======================
+# NORMALISASI
+# ======================
+def normalize_master(master_df):
+    """Master data -> kolom ID, Nama, Status, Kegiatan (header tidak peka huruf besar/kecil)."""
+    # normalize headers
+    master_df.columns = master_df.columns.str.strip()
+
+    # required: ID and NAMA
+    if not any(c.upper() == "ID" for c in master_df.columns) and not any(c.upper() == "NIP" for c in master_df.columns):
+        raise MasterDataError("❌ Master data tidak memiliki kolom 'ID' atau 'NIP'.\n\nPastikan Format Data Sesuai.")
+    if not any(c.upper() == "NAMA" for c in master_df.columns):
+        raise MasterDataError("❌ Master data tidak memiliki kolom 'NAMA'.\n\nPastikan Format Data Sesuai.")
+
+    id_col = None
+    for c in master_df.columns:
+        if c.strip().upper() in ["ID", "NIP"]:
+            id_col = c
+            break
+    name_col = None
+    for c in master_df.columns:
+        if c.strip().upper() == "NAMA":
+            name_col = c
+            break
+    status_col = None
+    for c in master_df.columns:
+        if c.strip().upper() == "STATUS":
+            status_col = c
+            break
+    kegiatan_col = None
+    for c in master_df.columns:
+        if c.strip().upper() in ["KEGIATAN", "KEGIATAN "]:
+            kegiatan_col = c
+            break
+
+    # create normalized master_df with columns ID, Nama, STATUS, KEGIATAN
+    master_norm = pd.DataFrame()
+    master_norm["ID"] = master_df[id_col].astype(str).str.strip() if id_col else ""
+    master_norm["Nama"] = master_df[name_col].astype(str).str.strip() if name_col else ""
+    master_norm["Status"] = master_df[status_col].astype(str).str.strip() if status_col else ""
+    if kegiatan_col:
+        master_norm["Kegiatan"] = master_df[kegiatan_col].astype(str).str.strip()
+    else:
+        master_norm["Kegiatan"] = ""
+    # remove accidental header-like rows etc
+    return master_norm.copy()
+
+# ======================
+# PENCOCOKAN NAMA (FUZZY)
+# ======================
+# skor minimal (rasio difflib) dan selisih minimal dengan kandidat kedua;
+# nama Indonesia banyak yang mirip (DENI / DEDI KURNIAWAN) jadi dibuat ketat
+FUZZY_THRESHOLD = 0.85
+FUZZY_MARGIN = 0.05
+FUZZY_CANDIDATES = 5
+
+def _fuzzy_key(name):
+    # huruf besar, tanda baca / spasi ganda -> satu spasi
+    return re.sub(r"[^A-Z0-9]+", " ", str(name).upper()).strip()
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameMatcher:
+    """Indeks trigram nama master: kandidat dicari lewat daftar terbalik per
+    trigram, bukan dengan membandingkan ke semua nama master."""
+
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(n for n in names if pd.notna(n)))
+        self.keys = [_fuzzy_key(n) for n in self.names]
+        postings = {}
+        for i, key in enumerate(self.keys):
+            for gram in _trigrams(key):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.sizes = np.array([len(_trigrams(k)) for k in self.keys])
+        self._cache = {}
+
+    def candidates(self, name):
+        """[(nama master, skor)] terurut, hanya yang skornya >= FUZZY_THRESHOLD."""
+        if name in self._cache:
+            return self._cache[name]
+        key = _fuzzy_key(name)
+        grams = _trigrams(key)
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        found = []
+        if hits:
+            # Dice trigram untuk menyaring, difflib untuk skor akhir
+            cand, shared = np.unique(np.concatenate(hits), return_counts=True)
+            dice = 2 * shared / (len(grams) + self.sizes[cand])
+            for i in cand[np.argsort(-dice, kind="stable")[:FUZZY_CANDIDATES]]:
+                score = 1.0 if self.keys[i] == key else SequenceMatcher(None, key, self.keys[i]).ratio()
+                if score >= FUZZY_THRESHOLD:
+                    found.append((self.names[i], score))
+            found.sort(key=lambda c: -c[1])
+        self._cache[name] = found
+        return found
+
+# ======================
+# INDEKS
+# ======================
+class MasterIndex:
+    """Master data ternormalisasi + indeks hash; dibuat sekali per versi master."""
+
+    def __init__(self, master_df, version=None):
+        self.df = master_df
+        self.version = version or master_version(master_df)
+
+        ids = normalize_id(master_df["ID"])
+        names = normalize_name(master_df["Nama"])
+        kegiatan = master_df["Kegiatan"].fillna("").astype(str).str.strip()
+        status = master_df["Status"]
+
+        # baris pertama menang bila kunci ganda (baris kosong di akhir file, dll)
+        self.status_by_id = {}
+        for i, s in zip(ids, status):
+            if pd.notna(i) and i not in self.status_by_id:
+                self.status_by_id[i] = s
+        self.kegiatan_by_name = {}
+        for n, k in zip(names, kegiatan):
+            if pd.notna(n) and n not in self.kegiatan_by_name:
+                self.kegiatan_by_name[n] = k
+
+        # nama kembar (pekerja berbeda, nama sama) dibedakan lewat ID
+        dup = names.duplicated(keep=False) & names.notna()
+        self.ambiguous_names = set(names[dup])
+        self.kegiatan_by_id_name = {
+            (i, n): k for i, n, k in zip(ids[dup], names[dup], kegiatan[dup])
+        }
+
+        self.ids_by_name = {}
+        for i, n in zip(ids, names):
+            if pd.notna(n):
+                self.ids_by_name.setdefault(n, set()).add(i)
+        self._matcher = None
+        # (ID, nama absen) -> (nama master, skor); satu MasterIndex per versi master
+        self._resolved = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def matcher(self):
+        # dibuat saat pertama ada nama yang tidak cocok persis
+        if self._matcher is None:
+            self._matcher = NameMatcher(self.kegiatan_by_name)
+        return self._matcher
+
+    def _resolve(self, id_, name):
+        """Nama master terdekat untuk satu (ID, nama absen), atau (None, skor terbaik)."""
+        key = (id_, name)
+        if key not in self._resolved:
+            found = self.matcher.candidates(name)
+            # kandidat dengan ID yang sama di master langsung dipakai; selain itu
+            # hanya bila sama persis setelah spasi/tanda baca dirapikan atau jelas unggul
+            same_id = [c for c in found if id_ in self.ids_by_name.get(c[0], ())]
+            if same_id:
+                pick = same_id[0]
+            elif found and (found[0][1] == 1.0 or len(found) == 1 or found[0][1] - found[1][1] >= FUZZY_MARGIN):
+                pick = found[0]
+            else:
+                pick = (None, found[0][1] if found else 0.0)
+            self._resolved[key] = pick
+        return self._resolved[key]
+
+    def resolve_names(self, ids, names):
+        """Nama absen -> nama master (persis, atau fuzzy bila tidak ada di master).
+
+        Mengembalikan (nama untuk lookup, DataFrame ID/Nama/Nama_Master/Skor
+        untuk nama yang dicocokkan secara fuzzy).
+        """
+        unknown = (~names.isin(self.kegiatan_by_name.keys()) & names.notna()).to_numpy()
+        matches = pd.DataFrame(columns=["ID", "Nama", "Nama_Master", "Skor"])
+        if not unknown.any():
+            return names, matches
+        pairs = pd.DataFrame({"ID": normalize_id(ids[unknown]).to_numpy(), "Nama": names[unknown].to_numpy()})
+        uniq = pairs.drop_duplicates()
+        picked = [self._resolve(i, n) for i, n in zip(uniq["ID"], uniq["Nama"])]
+        uniq = uniq.assign(Nama_Master=[p[0] for p in picked], Skor=[round(p[1], 3) for p in picked])
+        resolved = pairs.merge(uniq, on=["ID", "Nama"], how="left")["Nama_Master"].to_numpy()
+        names = names.copy()
+        names[unknown] = np.where(pd.isna(resolved), names[unknown].to_numpy(), resolved)
+        return names, uniq[uniq["Nama_Master"].notna()].reset_index(drop=True)
+
+    def kegiatan_for(self, ids, names):
+        """Kegiatan per baris (NaN bila nama tidak ada di master); names sudah huruf besar.
+
+        Nama yang tidak ada persis di master dicocokkan lewat NameMatcher.
+        """
+        names, _ = self.resolve_names(ids, names)
+        kegiatan = names.map(self.kegiatan_by_name)
+        amb = names.isin(self.ambiguous_names).to_numpy()
+        if amb.any():
+            keys = zip(normalize_id(ids[amb]), names[amb])
+            kegiatan[amb] = [self.kegiatan_by_id_name.get(key, first)
+                             for key, first in zip(keys, kegiatan[amb])]
+        return kegiatan
+
+    def status_for(self, ids):
+        """Status per baris berdasarkan ID ternormalisasi ("" bila tidak ada)."""
+        return ids.map(self.status_by_id).fillna("")
+
+def master_index(master):
+    """None / DataFrame ternormalisasi / MasterIndex -> MasterIndex atau None."""
+    if master is None or isinstance(master, MasterIndex):
+        return master
+    return MasterIndex(master)
+
+# ======================
+# STORE BERSAMA
+# ======================
+class MasterStore:
+    """Master data dari file, dimuat ulang hanya bila mtime/ukuran file berubah.
+
+    Penulisan lewat file sementara di folder yang sama lalu os.replace, jadi
+    sesi lain tidak pernah membaca file yang setengah tertulis.
+    """
+
+    def __init__(self, path=MASTER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = None
+
+    def _file_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self):
+        stamp = self._file_stamp()
+        with self._lock:
+            if stamp != self._stamp:
+                self._index = MasterIndex(normalize_master(read_default_master(self.path)))
+                self._stamp = stamp
+            return self._index
+
+    def save(self, master_df):
+        # validasi dulu: master tanpa kolom wajib tidak boleh menimpa file
+        index = MasterIndex(normalize_master(master_df.copy()))
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".master-", suffix=".csv.tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                master_df.to_csv(f, index=False, sep=";")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._index = index
+            self._stamp = self._file_stamp()
+        return index
+
+# satu store per proses, dipakai bersama oleh semua sesi Streamlit
+master_store = MasterStore()
@@ -0,0 +1,453 @@
+# absensi_pdf.py
+# Laporan PDF harian dan ZIP bulanan. Dipisah dari BIP.py supaya bisa
+# dijalankan di worker process (fungsi di skrip Streamlit tidak bisa di-pickle).
+import io, os, zipfile
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+# reportlab (platypus, styles, colors, canvas) baru di-import saat PDF pertama
+# dibuat; pagesizes ringan dan dipakai untuk konstanta tata letak
+from reportlab.lib.pagesizes import A4
+
+from absensi_artifacts import artifact_cache
+
+# kolom yang dipakai export_pdf_per_tanggal; hanya ini yang dikirim ke worker
+PDF_COLUMNS = ["ID", "Nama", "Kegiatan", "Shift1", "Shift2", "Shift3", "Detik_In", "Detik_Out"]
+
+# "platypus" (SimpleDocTemplate/Table) atau "canvas" (gambar langsung, lebih cepat)
+PDF_RENDERER = os.environ.get("ABSENSI_PDF_RENDERER", "platypus")
+
+# batas total ukuran PDF yang disimpan di cache per proses
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# style statis, dibuat sekali per proses saat PDF platypus pertama dirender
+_styles = None
+
+def _get_styles():
+    global _styles
+    if _styles is None:
+        from reportlab.platypus import TableStyle
+        from reportlab.lib import colors
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER
+        _styles = {
+            "title": ParagraphStyle(
+                name='CenterBoldTitle',
+                alignment=TA_CENTER,
+                fontSize=12,
+                leading=14,
+                spaceAfter=12,
+                fontName="Helvetica-Bold"
+            ),
+            "table": TableStyle([
+                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+                ("FONTSIZE", (0, 0), (-1, -1), 8),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("ALIGN", (2, 1), (2, -1), "LEFT"),
+                ("ALIGN", (3, 1), (3, -1), "LEFT"),
+                ("ROWHEIGHT", (0, 1), (-1, -1), 12),
+            ]),
+            "summary": TableStyle([
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ]),
+        }
+    return _styles
+
+def hari_indonesia(nama_hari):
+    mapping = {
+        "Monday":"Senin","Tuesday":"Selasa","Wednesday":"Rabu","Thursday":"Kamis",
+        "Friday":"Jumat","Saturday":"Sabtu","Sunday":"Minggu"
+    }
+    return mapping.get(nama_hari, nama_hari)
+
+def safe_text(val):
+    if pd.isna(val) or str(val).strip().lower() in ["nan", "none"]:
+        return ""
+    return str(val).strip()
+
+def jam_text(detik):
+    # detik sejak tengah malam -> "HH:MM:SS", kosong bila NaN (hanya untuk tampilan)
+    detik = np.asarray(detik, dtype="float64")
+    out = np.full(len(detik), "", dtype=object)
+    ok = ~np.isnan(detik)
+    out[ok] = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in detik[ok].astype(np.int64).tolist()]
+    return out
+
+def export_pdf_per_tanggal(df, tanggal, renderer=None):
+    if (renderer or PDF_RENDERER) == "canvas":
+        return export_pdf_canvas(df, tanggal)
+    return export_pdf_platypus(df, tanggal)
+
+def export_pdf_platypus(df, tanggal):
+    if df.empty:
+        return None
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+    styles = _get_styles()
+
+    buffer = io.BytesIO()
+
+    tanggal_dt = pd.to_datetime(tanggal)
+    hari = hari_indonesia(tanggal_dt.strftime("%A")).upper()
+    tgl_str = tanggal_dt.strftime("%d %B %Y").upper()
+
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=25, rightMargin=25, topMargin=25, bottomMargin=25
+    )
+    elements = []
+
+    # === Judul ===
+    judul = (
+        f"<b>ABSENSI PT. BUDI INTI PERKASA</b><br/>"
+        f"<b>HARI {hari} - TANGGAL {tgl_str}</b>"
+    )
+    elements.append(Paragraph(judul, styles["title"]))
+    elements.append(Spacer(1, 10))
+
+    # === Tabel utama ===
+    data = [["NO", "NIP", "NAMA PEKERJA", "KEGIATAN",
+             "SHIFT 1", "SHIFT 2", "SHIFT 3", "CEK IN", "CEK OUT"]]
+
+    cek_in, cek_out = jam_text(df["Detik_In"]), jam_text(df["Detik_Out"])
+    for j, (row, cin, cout) in enumerate(zip(df.itertuples(), cek_in, cek_out), start=1):
+        s1 = "✔" if getattr(row, "Shift1", 0) == 1 else ""
+        s2 = "✔" if getattr(row, "Shift2", 0) == 1 else ""
+        s3 = "✔" if getattr(row, "Shift3", 0) == 1 else ""
+        nama_cap = safe_text(row.Nama).title()
+        kegiatan_cap = safe_text(row.Kegiatan)
+
+        data.append([
+            j,
+            safe_text(row.ID),
+            nama_cap,
+            kegiatan_cap,
+            s1, s2, s3,
+            cin,
+            cout
+        ])
+
+    col_widths = [25, 40, 120, 95, 45, 45, 45, 55, 55]
+
+    table = Table(data, repeatRows=1, colWidths=col_widths)
+    table.setStyle(styles["table"])
+    elements.append(table)
+    elements.append(Spacer(1, 12))
+
+    # === Ringkasan total keseluruhan ===
+    total_s1 = df["Shift1"].sum()
+    total_s2 = df["Shift2"].sum()
+    total_s3 = df["Shift3"].sum()
+    total_all = int(total_s1 + total_s2 + total_s3)
+
+    summary_data = [
+        ["Shift 1", "Shift 2", "Shift 3", "Total Pekerja"],
+        [int(total_s1), int(total_s2), int(total_s3), total_all]
+    ]
+    summary_table = Table(summary_data, colWidths=[80, 80, 80, 100])
+    summary_table.setStyle(styles["summary"])
+    elements.append(summary_table)
+    elements.append(Spacer(1, 36))
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+# ======================
+# RENDERER CANVAS
+# ======================
+# Tata letak sama dengan export_pdf_platypus, tetapi posisi dihitung di muka:
+# A4, margin 25 + padding frame 6, tabel di tengah, baris 18pt, padding sel 6/3,
+# header tabel diulang di setiap halaman.
+PAGE_W, PAGE_H = A4
+FRAME_X = 25 + 6
+FRAME_W = PAGE_W - 2 * FRAME_X
+FRAME_TOP = PAGE_H - 25 - 6
+FRAME_BOTTOM = 25 + 6
+ROW_H = 18
+
+HEADER = ["NO", "NIP", "NAMA PEKERJA", "KEGIATAN",
+          "SHIFT 1", "SHIFT 2", "SHIFT 3", "CEK IN", "CEK OUT"]
+COL_WIDTHS = [25, 40, 120, 95, 45, 45, 45, 55, 55]
+SUMMARY_WIDTHS = [80, 80, 80, 100]
+# kolom NAMA dan KEGIATAN rata kiri (kecuali header), lainnya rata tengah
+LEFT_COLS = (2, 3)
+
+# judul 2 baris (leading 14) + spaceAfter 12 + Spacer 10
+TITLE_BASELINES = [FRAME_TOP - 12, FRAME_TOP - 12 - 14]
+TABLE_TOP_FIRST = FRAME_TOP - 28 - 12 - 10
+
+def _col_positions(widths):
+    return [sum(widths[:i]) for i in range(len(widths) + 1)]
+
+COL_POS = _col_positions(COL_WIDTHS)
+SUMMARY_POS = _col_positions(SUMMARY_WIDTHS)
+
+def _begin_table(c, col_pos, top, n_rows):
+    # seperti Flowable.drawOn: koordinat lokal dengan titik nol di pojok kiri bawah tabel
+    height = n_rows * ROW_H
+    c.saveState()
+    c.translate(FRAME_X + (FRAME_W - col_pos[-1]) / 2, top - height)
+    return [height - i * ROW_H for i in range(n_rows + 1)]
+
+def _draw_grid(c, col_pos, row_pos):
+    # urutan garis sama dengan GRID platypus (BOX lalu INNERGRID)
+    from reportlab.lib import colors
+    left, right, top, bottom = col_pos[0], col_pos[-1], row_pos[0], row_pos[-1]
+    c.setLineCap(1)
+    c.setLineJoin(1)
+    c.setLineWidth(0.5)
+    c.setStrokeColor(colors.black)
+    c.line(left, top, right, top)
+    c.line(left, bottom, right, bottom)
+    c.line(left, bottom, left, top)
+    c.line(right, bottom, right, top)
+    for y in row_pos[1:-1]:
+        c.line(left, y, right, y)
+    for x in col_pos[1:-1]:
+        c.line(x, bottom, x, top)
+
+def _draw_table_rows(c, rows, top):
+    # header + baris data mulai dari y = top; teks VALIGN MIDDLE (fontsize 8, leading 12)
+    from reportlab.lib import colors
+    row_pos = _begin_table(c, COL_POS, top, len(rows))
+    c.setFillColor(colors.lightblue)
+    c.rect(0, row_pos[1], COL_POS[-1], ROW_H, stroke=0, fill=1)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 8)
+    for r, cells in enumerate(rows):
+        y = row_pos[r + 1] + 7
+        for i, val in enumerate(cells):
+            if not val:
+                continue
+            if r > 0 and i in LEFT_COLS:
+                c.drawString(COL_POS[i] + 6, y, val)
+            else:
+                c.drawCentredString((COL_POS[i] + COL_POS[i + 1]) / 2, y, val)
+    _draw_grid(c, COL_POS, row_pos)
+    c.restoreState()
+
+def _draw_summary_rows(c, rows, with_header, top):
+    from reportlab.lib import colors
+    row_pos = _begin_table(c, SUMMARY_POS, top, len(rows))
+    if with_header:
+        c.setFillColor(colors.lightgrey)
+        c.rect(0, row_pos[1], SUMMARY_POS[-1], ROW_H, stroke=0, fill=1)
+        c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    for r, cells in enumerate(rows):
+        # VALIGN bawaan BOTTOM: padding 3 + leading 12 - fontsize 9
+        y = row_pos[r + 1] + 6
+        for i, val in enumerate(cells):
+            c.drawCentredString((SUMMARY_POS[i] + SUMMARY_POS[i + 1]) / 2, y, val)
+    _draw_grid(c, SUMMARY_POS, row_pos)
+    c.restoreState()
+
+def export_pdf_canvas(df, tanggal):
+    if df.empty:
+        return None
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    tanggal_dt = pd.to_datetime(tanggal)
+    hari = hari_indonesia(tanggal_dt.strftime("%A")).upper()
+    tgl_str = tanggal_dt.strftime("%d %B %Y").upper()
+
+    c = canvas.Canvas(buffer, pagesize=A4)
+
+    # === Judul ===
+    c.setFont("Helvetica-Bold", 12)
+    center = FRAME_X + FRAME_W / 2
+    c.drawCentredString(center, TITLE_BASELINES[0], "ABSENSI PT. BUDI INTI PERKASA")
+    c.drawCentredString(center, TITLE_BASELINES[1], f"HARI {hari} - TANGGAL {tgl_str}")
+
+    # === Tabel utama, dipotong per halaman ===
+    s1 = np.where(df["Shift1"].to_numpy() == 1, "✔", "")
+    s2 = np.where(df["Shift2"].to_numpy() == 1, "✔", "")
+    s3 = np.where(df["Shift3"].to_numpy() == 1, "✔", "")
+    body = [
+        [str(j), safe_text(nip), safe_text(nama).title(), safe_text(keg),
+         a, b, d, cin, cout]
+        for j, (nip, nama, keg, a, b, d, cin, cout) in enumerate(
+            zip(df["ID"], df["Nama"], df["Kegiatan"], s1, s2, s3, jam_text(df["Detik_In"]), jam_text(df["Detik_Out"])),
+            start=1)
+    ]
+
+    top = TABLE_TOP_FIRST
+    start = 0
+    while True:
+        fit = int((top - FRAME_BOTTOM) // ROW_H) - 1
+        chunk = body[start:start + fit]
+        _draw_table_rows(c, [HEADER] + chunk, top)
+        start += len(chunk)
+        if start >= len(body):
+            y = top - (len(chunk) + 1) * ROW_H
+            break
+        c.showPage()
+        top = FRAME_TOP
+
+    # === Ringkasan total keseluruhan ===
+    total_s1 = int(df["Shift1"].sum())
+    total_s2 = int(df["Shift2"].sum())
+    total_s3 = int(df["Shift3"].sum())
+    summary = [
+        ["Shift 1", "Shift 2", "Shift 3", "Total Pekerja"],
+        [str(total_s1), str(total_s2), str(total_s3), str(total_s1 + total_s2 + total_s3)],
+    ]
+    # aturan frame platypus: Spacer yang tidak muat pindah ke halaman berikut,
+    # tabel ringkasan dipecah per baris, Spacer 36 penutup bisa membuat halaman kosong
+    if y - 12 < FRAME_BOTTOM:
+        c.showPage()
+        y = FRAME_TOP
+    y -= 12
+    r = 0
+    while r < len(summary):
+        fit = int((y - FRAME_BOTTOM) // ROW_H)
+        if fit == 0:
+            c.showPage()
+            y = FRAME_TOP
+            continue
+        part = summary[r:r + fit]
+        _draw_summary_rows(c, part, r == 0, y)
+        y -= len(part) * ROW_H
+        r += len(part)
+    c.showPage()
+    if y - 36 < FRAME_BOTTOM:
+        c.showPage()
+
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+# ======================
+# CACHE PDF PER TANGGAL
+# ======================
+# kunci = tanggal + sidik jari baris hari itu, jadi PDF hanya dirender ulang
+# bila data tanggal tersebut berubah. LRU di memori dibatasi PDF_CACHE_MAX_BYTES;
+# di bawahnya cache artefak di disk (bertahan setelah restart, dipakai bersama).
+_pdf_cache = OrderedDict()
+_pdf_cache_bytes = 0
+_pdf_cache_lock = threading.Lock()
+
+def pdf_cache_key(df, tanggal, renderer=None):
+    cols = [c for c in PDF_COLUMNS if c in df.columns]
+    hashed = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    return str(tanggal), renderer or PDF_RENDERER, hashlib.sha1(hashed.tobytes()).hexdigest()
+
+def _pdf_cache_get(key):
+    with _pdf_cache_lock:
+        data = _pdf_cache.get(key)
+        if data is not None:
+            _pdf_cache.move_to_end(key)
+            return data
+    data = artifact_cache.get(("pdf",) + key, ext="pdf")
+    if data is not None:
+        _pdf_cache_put(key, data, disk=False)
+    return data
+
+def _pdf_cache_put(key, data, disk=True):
+    global _pdf_cache_bytes
+    if disk:
+        artifact_cache.put(("pdf",) + key, data, ext="pdf")
+    with _pdf_cache_lock:
+        if key in _pdf_cache:
+            return
+        _pdf_cache[key] = data
+        _pdf_cache_bytes += len(data)
+        while _pdf_cache_bytes > PDF_CACHE_MAX_BYTES and len(_pdf_cache) > 1:
+            _, old = _pdf_cache.popitem(last=False)
+            _pdf_cache_bytes -= len(old)
+
+def export_pdf_cached(df, tanggal, renderer=None):
+    """Seperti export_pdf_per_tanggal, tetapi mengembalikan bytes dari cache bila ada."""
+    if df.empty:
+        return None
+    key = pdf_cache_key(df, tanggal, renderer)
+    data = _pdf_cache_get(key)
+    if data is None:
+        data = export_pdf_per_tanggal(df, tanggal, renderer).getvalue()
+        _pdf_cache_put(key, data)
+    return data
+
+# ======================
+# ZIP BULANAN (PARALEL)
+# ======================
+_pool = None
+
+def _get_pool():
+    # pool dibuat sekali per proses dan dipakai ulang di setiap rerun;
+    # "spawn" karena server Streamlit multi-thread tidak aman di-fork
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+def _render_pdf_bytes(args):
+    df_day, tgl, renderer = args
+    pdfb = export_pdf_per_tanggal(df_day, tgl, renderer)
+    return pdfb.getvalue() if pdfb else None
+
+def build_monthly_zip(final_result, progress=None, renderer=None, parallel=True):
+    """ZIP berisi PDF harian untuk setiap tanggal di final_result, urut tanggal.
+
+    Data per tanggal diambil dari satu kali groupby("Tanggal"); PDF yang sudah
+    ada di cache dipakai ulang, sisanya dirender paralel di process pool bila CPU
+    lebih dari satu (``parallel=False`` untuk pemanggil yang sudah berjalan di
+    worker process). ``progress(selesai, total)`` dipanggil setiap satu PDF masuk ZIP.
+    """
+    cols = [c for c in PDF_COLUMNS if c in final_result.columns] + ["Tanggal"]
+    renderer = renderer or PDF_RENDERER
+    # Tanggal datetime64 -> date untuk judul, nama file dan kunci cache
+    jobs = [(df_day.drop(columns="Tanggal"), pd.Timestamp(tgl).date(), renderer)
+            for tgl, df_day in final_result[cols].groupby("Tanggal", sort=True)
+            if not df_day.empty]
+    keys = [pdf_cache_key(df_day, tgl, renderer) for df_day, tgl, _ in jobs]
+    cached = {i: _pdf_cache_get(k) for i, k in enumerate(keys)}
+    todo = [jobs[i] for i, data in cached.items() if data is None]
+
+    if parallel and (os.cpu_count() or 1) > 1 and len(todo) > 1:
+        rendered = _get_pool().map(_render_pdf_bytes, todo)
+    else:
+        rendered = map(_render_pdf_bytes, todo)
+
+    mem_zip = io.BytesIO()
+    with zipfile.ZipFile(mem_zip, mode="w") as zf:
+        for i, (_, tgl, _) in enumerate(jobs):
+            pdf_bytes = cached[i]
+            if pdf_bytes is None:
+                pdf_bytes = next(rendered)
+                _pdf_cache_put(keys[i], pdf_bytes)
+            if pdf_bytes:
+                fname = f"absen_{tgl}.pdf".replace("/", "-")
+                zf.writestr(fname, pdf_bytes)
+            if progress:
+                progress(i + 1, len(jobs))
+    return mem_zip.getvalue()
+
+def combine_zips(parts, extra_files=None):
+    """Satu ZIP gabungan dari ZIP per partisi: isi tiap ZIP masuk folder <label>/.
+
+    ``parts`` berisi (label, zip_bytes); ``extra_files`` {path di ZIP: isi}
+    untuk berkas tambahan seperti rekap CSV per partisi.
+    """
+    mem_zip = io.BytesIO()
+    with zipfile.ZipFile(mem_zip, mode="w") as out:
+        for label, zip_bytes in parts:
+            with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+                for name in zf.namelist():
+                    out.writestr(f"{label}/{name}", zf.read(name))
+        for name, data in (extra_files or {}).items():
+            out.writestr(name, data)
+    return mem_zip.getvalue()
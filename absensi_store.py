@@ -0,0 +1,264 @@
+# absensi_store.py
+# Arsip punch absensi lokal (SQLite) supaya upload harian cukup menambah data
+# baru: punch disimpan tanpa duplikat, dan hanya pekerja-hari yang tersentuh
+# upload baru yang dihitung ulang jam cek in/out dan shift-nya. Rekap bulanan
+# disusun dari hasil per hari yang tersimpan. Site (pabrik) ikut disimpan
+# supaya partisi bulan x site sama dengan mode tanpa arsip.
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from absensi_core import aggregate_cek_in_out, encode_shifts_batch, merge_kegiatan, as_category
+from absensi_master import normalize_id
+
+STORE_PATH = os.environ.get("ABSENSI_STORE_PATH", "absensi_arsip.sqlite")
+
+# punch tanpa Lokasi_ID dihitung sebagai masuk sekaligus keluar (sama dengan
+# file tanpa kolom Lokasi_ID di aggregate_cek_in_out)
+LOKASI_KOSONG = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS punch (
+    ID TEXT NOT NULL,
+    Nama TEXT NOT NULL,
+    Tanggal_Waktu INTEGER NOT NULL,
+    Lokasi_ID TEXT NOT NULL,
+    Tanggal TEXT NOT NULL,
+    Detik REAL NOT NULL,
+    Bulan TEXT NOT NULL,
+    Site TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (ID, Tanggal_Waktu, Lokasi_ID, Site)
+);
+CREATE INDEX IF NOT EXISTS punch_hari ON punch (ID, Nama, Tanggal);
+CREATE INDEX IF NOT EXISTS punch_waktu ON punch (Tanggal_Waktu);
+CREATE TABLE IF NOT EXISTS harian (
+    ID TEXT NOT NULL,
+    Nama TEXT NOT NULL,
+    Tanggal TEXT NOT NULL,
+    Detik_In REAL,
+    Detik_Out REAL,
+    Shift1 REAL,
+    Shift2 REAL,
+    Shift3 REAL,
+    Bulan TEXT NOT NULL,
+    Site TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (ID, Nama, Tanggal, Site)
+);
+CREATE INDEX IF NOT EXISTS harian_bulan ON harian (Bulan);
+CREATE TABLE IF NOT EXISTS upload (
+    hash TEXT PRIMARY KEY,
+    waktu TEXT NOT NULL,
+    punch_baru INTEGER NOT NULL,
+    hari_dihitung INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+HARI_KEY = ["ID", "Nama", "Tanggal", "Site"]
+# punch yang sama persis di dua site tetap dihitung di kedua site, sama
+# dengan groupby per Site di aggregate_cek_in_out
+PUNCH_KEY = ["ID", "Tanggal_Waktu", "Lokasi_ID", "Site"]
+INDEXES = {"punch": ["punch_hari", "punch_waktu"], "harian": ["harian_bulan"]}
+
+def _migrate(con):
+    """Arsip lama tanpa kolom Site: tabel punch dan harian dibuat ulang (PRIMARY
+    KEY ikut berubah) dengan Site "" untuk semua baris lama."""
+    for table, indexes in INDEXES.items():
+        columns = [r[1] for r in con.execute(f"PRAGMA table_info({table})")]
+        if "Site" in columns:
+            continue
+        cols = ", ".join(columns)
+        with con:
+            con.execute(f"ALTER TABLE {table} RENAME TO {table}_lama")
+            for index in indexes:
+                con.execute(f"DROP INDEX IF EXISTS {index}")
+        # executescript meng-commit sendiri, jadi dijalankan di luar transaksi
+        con.executescript(SCHEMA)
+        with con:
+            con.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {table}_lama ORDER BY rowid")
+            con.execute(f"DROP TABLE {table}_lama")
+
+
+def _punch_rows(df_clean):
+    """df_clean -> baris tabel punch (kunci unik ID, Tanggal_Waktu, Lokasi_ID, Site)."""
+    df = df_clean.dropna(subset=["Tanggal_Waktu"])
+    if "Lokasi_ID" in df.columns:
+        # 2 / "2" / 2.0 disimpan sama: "2"
+        lokasi = normalize_id(df["Lokasi_ID"]).fillna(LOKASI_KOSONG)
+    else:
+        lokasi = LOKASI_KOSONG
+    tw = df["Tanggal_Waktu"]
+    # tanggal diformat sekali per hari unik, bukan per punch
+    codes, days = pd.factorize(tw.dt.normalize())
+    rows = pd.DataFrame({
+        "ID": df["ID"].astype(str) if "ID" in df.columns else "",
+        "Nama": df["Nama"].astype(str),
+        # mikrodetik sejak epoch: kunci unik yang murah dibandingkan
+        "Tanggal_Waktu": (tw - pd.Timestamp(0)) // pd.Timedelta(microseconds=1),
+        "Lokasi_ID": lokasi,
+        "Tanggal": pd.DatetimeIndex(days).strftime("%Y-%m-%d").to_numpy()[codes],
+        "Detik": df["Detik"].to_numpy(dtype="float64"),
+    })
+    rows["Bulan"] = rows["Tanggal"].str[:7]
+    # file tanpa kolom Site disimpan dengan Site "" (satu partisi per bulan)
+    rows["Site"] = df["Site"].astype(str).to_numpy() if "Site" in df.columns else ""
+    return rows.drop_duplicates(PUNCH_KEY)
+
+
+def _records(df):
+    # tuple Python biasa untuk executemany (lebih cepat dari itertuples pada kolom string)
+    return zip(*(df[c].tolist() for c in df.columns))
+
+
+def _hitung_harian(punch):
+    """Punch semua pekerja-hari yang tersentuh -> baris tabel harian."""
+    kosong = punch["Lokasi_ID"] == LOKASI_KOSONG
+    if kosong.any():
+        # tanpa Lokasi_ID: jadikan punch masuk (2) dan keluar (1)
+        punch = pd.concat([punch[~kosong], punch[kosong].assign(Lokasi_ID="2"),
+                           punch[kosong].assign(Lokasi_ID="1")], ignore_index=True)
+    harian = aggregate_cek_in_out(punch)[HARI_KEY + ["Detik_In", "Detik_Out"]]
+    harian[["Shift1", "Shift2", "Shift3"]] = encode_shifts_batch(harian["Detik_In"], harian["Detik_Out"], shift_hours=8)
+    harian["Bulan"] = harian["Tanggal"].str[:7]
+    return harian
+
+
+class PunchStore:
+    """Arsip punch + hasil per pekerja-hari dalam satu file SQLite.
+
+    Setiap operasi membuka koneksi sendiri sehingga aman dipakai dari beberapa
+    sesi Streamlit sekaligus (WAL: pembaca tidak menunggu penulis).
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(SCHEMA)
+        _migrate(con)
+        return con
+
+    def revision(self):
+        """Naik setiap ada punch baru; dipakai sebagai bagian kunci cache."""
+        con = self._connect()
+        try:
+            row = con.execute("SELECT value FROM meta WHERE key = 'revisi'").fetchone()
+            return int(row[0]) if row else 0
+        finally:
+            con.close()
+
+    def months(self):
+        con = self._connect()
+        try:
+            return [r[0] for r in con.execute("SELECT DISTINCT Bulan FROM harian ORDER BY Bulan")]
+        finally:
+            con.close()
+
+    def append(self, df_clean, upload_hash=None):
+        """Tambahkan hasil clean_and_normalize ke arsip.
+
+        Mengembalikan dict punch_baru, duplikat, hari_dihitung, bulan (bulan yang
+        tersentuh). Upload dengan hash yang sama hanya diproses sekali.
+
+        Semua baca-lalu-tulis berjalan dalam satu transaksi BEGIN IMMEDIATE:
+        dua job upload yang menambah arsip bersamaan dijalankan bergantian,
+        jadi punch_baru dan pekerja-hari yang tersentuh tidak tercampur.
+        """
+        rows = _punch_rows(df_clean)
+        con = self._connect()
+        try:
+            with con:
+                # kunci tulis diambil sebelum membaca apa pun (penulis lain menunggu, timeout 30 s)
+                con.execute("BEGIN IMMEDIATE")
+                if upload_hash is not None:
+                    seen = con.execute("SELECT punch_baru, hari_dihitung FROM upload WHERE hash = ?", (upload_hash,)).fetchone()
+                    if seen is not None:
+                        return {"punch_baru": 0, "duplikat": len(rows), "hari_dihitung": 0,
+                                "bulan": sorted(rows["Bulan"].unique()), "sudah_ada": True}
+                # export kumulatif: sebagian besar punch sudah ada; saring dulu
+                # dengan kunci yang tersimpan di rentang waktu upload ini
+                if not rows.empty:
+                    existing = pd.DataFrame(con.execute(
+                        "SELECT ID, Tanggal_Waktu, Lokasi_ID, Site FROM punch WHERE Tanggal_Waktu BETWEEN ? AND ?",
+                        (int(rows["Tanggal_Waktu"].min()), int(rows["Tanggal_Waktu"].max()))
+                    ).fetchall(), columns=PUNCH_KEY)
+                    if not existing.empty:
+                        existing = existing.astype({c: rows[c].dtype for c in ("ID", "Lokasi_ID", "Site")})
+                        ada = pd.MultiIndex.from_frame(rows[PUNCH_KEY]).isin(pd.MultiIndex.from_frame(existing))
+                        rows_baru = rows[~ada]
+                    else:
+                        rows_baru = rows
+                else:
+                    rows_baru = rows
+
+                # punch yang sudah ada diabaikan oleh PRIMARY KEY; yang baru
+                # dikenali dari rowid di atas rowid terakhir sebelum insert
+                last_rowid = con.execute("SELECT COALESCE(MAX(rowid), 0) FROM punch").fetchone()[0]
+                con.executemany(f"INSERT OR IGNORE INTO punch ({', '.join(rows_baru.columns)}) "
+                                f"VALUES ({', '.join('?' * rows_baru.shape[1])})", _records(rows_baru))
+                n_baru = con.execute("SELECT COUNT(*) FROM punch WHERE rowid > ?", (last_rowid,)).fetchone()[0]
+
+                # pekerja-hari yang tersentuh -> hitung ulang dari semua punch-nya
+                con.execute("DROP TABLE IF EXISTS temp.sentuh")
+                con.execute("CREATE TEMP TABLE sentuh AS SELECT DISTINCT ID, Nama, Tanggal, Site FROM punch WHERE rowid > ?", (last_rowid,))
+                punch = pd.read_sql_query("""
+                    SELECT p.ID, p.Nama, p.Tanggal, p.Site, p.Detik, p.Lokasi_ID FROM punch p
+                    JOIN temp.sentuh s ON p.ID = s.ID AND p.Nama = s.Nama AND p.Tanggal = s.Tanggal AND p.Site = s.Site
+                """, con)
+                n_hari = 0
+                if not punch.empty:
+                    harian = _hitung_harian(punch)
+                    # row-value IN memakai PRIMARY KEY harian (bukan scan seluruh tabel)
+                    con.execute("DELETE FROM harian WHERE (ID, Nama, Tanggal, Site) IN (SELECT ID, Nama, Tanggal, Site FROM temp.sentuh)")
+                    con.executemany(f"INSERT INTO harian ({', '.join(harian.columns)}) VALUES ({', '.join('?' * harian.shape[1])})",
+                                    _records(harian))
+                    n_hari = len(harian)
+
+                bulan = [r[0] for r in con.execute("SELECT DISTINCT Bulan FROM punch WHERE rowid > ? ORDER BY Bulan", (last_rowid,))]
+                if n_baru:
+                    con.execute("""
+                        INSERT INTO meta (key, value) VALUES ('revisi', '1')
+                        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+                    """)
+                if upload_hash is not None:
+                    con.execute("INSERT INTO upload VALUES (?, ?, ?, ?)",
+                                (upload_hash, datetime.now().isoformat(timespec="seconds"), n_baru, n_hari))
+            return {"punch_baru": n_baru, "duplikat": len(rows) - n_baru, "hari_dihitung": n_hari,
+                    "bulan": bulan or sorted(rows["Bulan"].unique()), "sudah_ada": False}
+        finally:
+            con.close()
+
+    def month_result(self, bulan, master):
+        """final_result untuk satu bulan ("YYYY-MM") atau daftar bulan, dari hasil
+        per hari yang tersimpan.
+
+        Kolom dan urutan baris sama dengan process_absensi (termasuk Site);
+        Kegiatan diambil dari master saat dibaca sehingga perubahan master tidak
+        perlu hitung ulang.
+        """
+        bulan = [bulan] if isinstance(bulan, str) else list(bulan)
+        con = self._connect()
+        try:
+            # satu query untuk semua bulan: kolom categorical tidak perlu digabung
+            result = pd.read_sql_query(f"""
+                SELECT ID, Nama, Tanggal, Site, Detik_In, Detik_Out, Shift1, Shift2, Shift3
+                FROM harian WHERE Bulan IN ({', '.join('?' * len(bulan))}) ORDER BY ID, Nama, Tanggal, Site
+            """, con, params=bulan)
+        finally:
+            con.close()
+        shifts = result[["Shift1", "Shift2", "Shift3"]].astype("float64").to_numpy()
+        result = result.drop(columns=["Shift1", "Shift2", "Shift3"])
+        result["ID"] = as_category(result["ID"])
+        result["Site"] = as_category(result["Site"])
+        result["Tanggal"] = pd.to_datetime(result["Tanggal"])
+        result[["Detik_In", "Detik_Out"]] = result[["Detik_In", "Detik_Out"]].astype("float32")
+        final_result = merge_kegiatan(result, master)
+        final_result[["Shift1", "Shift2", "Shift3"]] = shifts
+        return final_result
+
+# satu arsip per proses aplikasi
+punch_store = PunchStore()
@@ -0,0 +1,85 @@
+# benchmarks/bench_excel.py
+# Bandingkan pembacaan Excel absensi: pd.read_excel (semua kolom, lalu
+# clean_and_normalize) vs read_excel_columns (stream read-only, 4 kolom saja).
+#
+#   python benchmarks/bench_excel.py --employees 2000 --days 31 --extra-cols 8
+#
+# Export mesin fingerprint biasanya punya banyak kolom yang tidak dipakai
+# (departemen, mesin, catatan ...); --extra-cols menambah kolom seperti itu.
+import argparse
+import os
+import sys
+import tempfile
+import time as _time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import absensi_core as core  # noqa: E402
+from gen_absensi import generate_absensi, write_absensi, xls_skip_reason  # noqa: E402
+
+
+def old_path(file_bytes, fname):
+    return core.clean_and_normalize(core.read_absensi(file_bytes, fname))
+
+
+def new_path(file_bytes, fname):
+    return core.load_absensi(file_bytes, fname)
+
+
+def run(fn, file_bytes, fname, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = _time.perf_counter()
+        out = fn(file_bytes, fname)
+        best = min(best, _time.perf_counter() - start)
+    # memori diukur terpisah: tracemalloc memperlambat pembacaan
+    tracemalloc.start()
+    fn(file_bytes, fname)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return out, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pembacaan Excel absensi.")
+    parser.add_argument("--employees", type=int, default=450)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--extra-cols", type=int, default=6, help="kolom tambahan yang tidak dipakai")
+    parser.add_argument("--format", nargs="+", choices=["xlsx", "xls"], default=["xlsx", "xls"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = generate_absensi(args.employees, args.days, seed=args.seed)
+    for i in range(args.extra_cols):
+        df[f"Kolom {i + 1}"] = f"isi {i + 1}"
+    print(f"{len(df)} baris, {df.shape[1]} kolom")
+    print(f"{'format':<6} {'jalur':<14} {'detik':>8} {'puncak MB':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.format:
+            skip = xls_skip_reason(len(df)) if fmt == "xls" else None
+            if skip:
+                print(f"[xls] dilewati: {skip}")
+                continue
+            path = write_absensi(df, os.path.join(tmp, f"absen.{fmt}"))
+            with open(path, "rb") as f:
+                file_bytes = f.read()
+            fname = os.path.basename(path)
+            results = {}
+            for name, fn in [("read_excel", old_path), ("read_columns", new_path)]:
+                out, seconds, peak = run(fn, file_bytes, fname, args.repeat)
+                results[name] = (out, seconds)
+                print(f"{fmt:<6} {name:<14} {seconds:>8.3f} {peak:>10.1f}")
+            # ID teks dibandingkan setelah normalize_id: read_excel mengubah "4040"
+            # menjadi 4040.0 bila kolomnya campur, jalur baru menyimpan teks aslinya
+            old, new = (results[k][0].reset_index(drop=True) for k in ("read_excel", "read_columns"))
+            same = (old.assign(ID=core.normalize_id(old["ID"]))
+                    .equals(new.assign(ID=core.normalize_id(new["ID"]))))
+            speedup = results["read_excel"][1] / results["read_columns"][1]
+            print(f"{fmt:<6} {speedup:.1f}x lebih cepat, hasil {'sama' if same else 'BERBEDA'}")
+
+
+if __name__ == "__main__":
+    main()
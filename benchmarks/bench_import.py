@@ -0,0 +1,62 @@
+# benchmarks/bench_import.py
+# Waktu import "preamble" BIP.py pada proses Python baru (cold start), dan
+# dependensi berat mana yang sudah ikut termuat sebelum widget upload tampil.
+#
+#   python benchmarks/bench_import.py --repeat 9
+#
+# Setiap ulangan memakai subprocess baru supaya sys.modules masih kosong.
+# streamlit + pandas diukur terpisah dari modul aplikasi (yang di-import
+# sesudahnya), karena keduanya selalu dibutuhkan dan mendominasi waktu total.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modul yang di-import di bagian atas BIP.py
+BASE = ["streamlit", "pandas"]
+PREAMBLE = [
+    "absensi_core", "absensi_pdf", "absensi_store", "absensi_jobs",
+    "absensi_dashboard", "absensi_employee", "absensi_anomaly", "absensi_diag",
+]
+# dependensi berat yang seharusnya baru dimuat saat fiturnya dipakai
+HEAVY = ["reportlab.platypus", "reportlab.pdfgen.canvas", "plotly.express", "plotly.io"]
+
+SCRIPT = """
+import sys, time
+def timed(modules):
+    t = time.perf_counter()
+    for name in modules:
+        __import__(name)
+    return (time.perf_counter() - t) * 1000
+print(timed({base!r}), timed({modules!r}), *[int(m in sys.modules) for m in {heavy!r}])
+"""
+
+
+def measure():
+    """(ms streamlit + pandas, ms modul aplikasi, [dependensi berat termuat?])."""
+    code = SCRIPT.format(base=BASE, modules=PREAMBLE, heavy=HEAVY)
+    env = dict(os.environ, ABSENSI_CACHE_MAX_MB="0")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), float(out[1]), [bool(int(x)) for x in out[2:]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Waktu import preamble BIP.py (cold start).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    for label, i in (("streamlit + pandas", 0), ("modul aplikasi", 1)):
+        ms = [r[i] for r in runs]
+        print(f"{label:<20} median {statistics.median(ms):8.1f} ms   min {min(ms):8.1f} ms")
+    # plotly.io juga di-import oleh streamlit sendiri (tema grafik)
+    loaded = [name for name, hit in zip(HEAVY, runs[-1][2]) if hit]
+    print(f"{'termuat di awal':<20} {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
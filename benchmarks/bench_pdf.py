@@ -0,0 +1,74 @@
+# benchmarks/bench_pdf.py
+# Bandingkan kecepatan renderer PDF harian: platypus (bawaan) vs canvas.
+#
+#   python benchmarks/bench_pdf.py --rows 450 --days 10
+#
+# Sebagian besar waktu renderer canvas habis di serialisasi PDF reportlab;
+# dengan akselerator C (paket rl_accel) selisihnya makin besar.
+import argparse
+import os
+import sys
+import time as _time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from absensi_pdf import export_pdf_platypus, export_pdf_canvas  # noqa: E402
+
+
+def sample_day(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    shift = rng.integers(0, 3, rows)
+    # jam cek in/out sebagai detik sejak tengah malam, seperti final_result
+    detik_in = rng.choice([6, 14, 22], rows) * 3600 + rng.integers(0, 3600, rows)
+    detik_out = rng.choice([15, 23, 7], rows) * 3600 + rng.integers(0, 3600, rows)
+    return pd.DataFrame({
+        "ID": [str(1000 + i) for i in range(rows)],
+        "Nama": [f"PEKERJA NOMOR {i}" for i in range(rows)],
+        "Kegiatan": rng.choice(["Mandor", "Oper2 Bb", "Silo", "Bongkaran"], rows),
+        "Shift1": (shift == 0).astype(float),
+        "Shift2": (shift == 1).astype(float),
+        "Shift3": (shift == 2).astype(float),
+        "Detik_In": detik_in.astype("float32"),
+        "Detik_Out": detik_out.astype("float32"),
+    })
+
+
+def count_pages(pdf_bytes):
+    return pdf_bytes.count(b"/Type /Page\n") or pdf_bytes.count(b"/Type /Page")
+
+
+def run(renderer, frames):
+    pages = 0
+    start = _time.perf_counter()
+    for tgl, df in frames:
+        pages += count_pages(renderer(df, tgl).getvalue())
+    elapsed = _time.perf_counter() - start
+    return pages, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan renderer PDF harian: platypus vs canvas.")
+    parser.add_argument("--rows", type=int, default=450, help="pekerja per hari")
+    parser.add_argument("--days", type=int, default=10, help="jumlah PDF harian")
+    args = parser.parse_args()
+
+    frames = [(date(2024, 1, 1) + timedelta(days=d), sample_day(args.rows, d)) for d in range(args.days)]
+    # pemanasan: import font & cache reportlab
+    export_pdf_platypus(frames[0][1], frames[0][0])
+    export_pdf_canvas(frames[0][1], frames[0][0])
+
+    print(f"{args.days} PDF x {args.rows} baris")
+    print(f"{'renderer':<10} {'halaman':>8} {'detik':>8} {'hal/detik':>10}")
+    results = {}
+    for name, renderer in [("platypus", export_pdf_platypus), ("canvas", export_pdf_canvas)]:
+        pages, elapsed = run(renderer, frames)
+        results[name] = pages / elapsed
+        print(f"{name:<10} {pages:>8} {elapsed:>8.2f} {pages / elapsed:>10.1f}")
+    print(f"canvas {results['canvas'] / results['platypus']:.1f}x lebih cepat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# benchmarks/bench_pipeline.py
+# Benchmark per tahap pipeline absensi dengan data sintetis (gen_absensi.py).
+#
+#   python benchmarks/bench_pipeline.py --employees 2000 --days 31 --format csv xlsx
+#   python benchmarks/bench_pipeline.py --compare benchmarks/results/sebelumnya.json
+#
+# Setiap tahap diukur terpisah (waktu terbaik dari --repeat kali) lalu dijalankan
+# sekali lagi di bawah tracemalloc untuk puncak memori. Hasil disimpan sebagai
+# JSON supaya bisa dibandingkan antar versi dengan --compare.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time as _time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# cache artefak di disk dimatikan: setiap tahap harus benar-benar dihitung
+os.environ["ABSENSI_CACHE_MAX_MB"] = "0"
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import absensi_core as core  # noqa: E402
+import absensi_pdf  # noqa: E402
+from absensi_anomaly import detect_anomalies  # noqa: E402
+from gen_absensi import generate_absensi, write_absensi, xls_skip_reason  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def measure(fn, repeat, memory):
+    """(hasil, detik terbaik, puncak MB atau None)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = _time.perf_counter()
+        out = fn()
+        best = min(best, _time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return out, best, peak
+
+
+def clear_pdf_cache():
+    # tahap PDF/ZIP harus benar-benar merender, bukan mengambil dari cache proses
+    with absensi_pdf._pdf_cache_lock:
+        absensi_pdf._pdf_cache.clear()
+        absensi_pdf._pdf_cache_bytes = 0
+
+
+def count_pages(pdf_bytes):
+    return pdf_bytes.count(b"/Type /Page\n") or pdf_bytes.count(b"/Type /Page")
+
+
+def run_stages(path, master, args):
+    fname = os.path.basename(path)
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    stages = {}
+
+    def stage(name, fn, items, unit, repeat=args.repeat):
+        out, seconds, peak = measure(fn, repeat, not args.no_memory)
+        n = items(out) if callable(items) else items
+        stages[name] = {
+            "seconds": round(seconds, 6),
+            "items": int(n),
+            "unit": unit,
+            "per_second": round(n / seconds, 1) if seconds > 0 else None,
+            "peak_mb": round(peak, 2) if peak is not None else None,
+        }
+        print(f"  {name:<14} {seconds:>9.3f} s {n:>10} {unit:<13} "
+              f"{stages[name]['per_second'] or 0:>12,.0f}/s"
+              + (f" {peak:>9.1f} MB" if peak is not None else ""))
+        return out
+
+    raw = stage("read", lambda: core.read_absensi(file_bytes, fname), len, "baris")
+    ts_col = next(c for c in raw.columns if str(c).strip() in ("Tgl/Waktu", "Tanggal_Waktu", "Tanggal", "Waktu"))
+    stage("parse_datetime", lambda: core.parse_datetime_series(raw[ts_col]), len(raw), "baris")
+    df_clean = stage("clean", lambda: core.clean_and_normalize(raw.copy()), len, "baris")
+    # memori representasi internal (kolom categorical / datetime64 / int32)
+    bytes_per_punch = df_clean.memory_usage(deep=True).sum() / max(len(df_clean), 1)
+    print(f"  {'df_clean':<14} {bytes_per_punch:>9.1f} B/punch")
+    # jalur yang dipakai aplikasi: baca + clean sekaligus (CSV per chunk)
+    stage("load", lambda: core.load_absensi(file_bytes, fname), len, "baris")
+    result = stage("cek_in_out", lambda: core.aggregate_cek_in_out(df_clean), len, "pekerja-hari")
+    n_days = len(result)
+    stage("encode_shifts", lambda: core.encode_shifts_batch(result["Detik_In"], result["Detik_Out"]), n_days, "pekerja-hari")
+    stage("master_merge", lambda: core.merge_kegiatan(result.copy(), master), n_days, "pekerja-hari")
+    final_result = core.process_absensi(df_clean, master)
+    bytes_per_day = final_result.memory_usage(deep=True).sum() / max(len(final_result), 1)
+    print(f"  {'final_result':<14} {bytes_per_day:>9.1f} B/pekerja-hari")
+    stage("rekap", lambda: core.build_rekap(final_result, master), n_days, "pekerja-hari")
+    stage("anomalies", lambda: detect_anomalies(df_clean, final_result, master), n_days, "pekerja-hari")
+
+    # PDF harian: tanggal dengan pekerja terbanyak
+    busiest = final_result["Tanggal"].value_counts().idxmax()
+    df_day = final_result[final_result["Tanggal"] == busiest]
+
+    def daily_pdf():
+        clear_pdf_cache()
+        return absensi_pdf.export_pdf_per_tanggal(df_day, busiest, args.renderer).getvalue()
+    stage("daily_pdf", daily_pdf, lambda pdf: count_pages(pdf), "halaman")
+
+    def monthly_zip():
+        clear_pdf_cache()
+        return absensi_pdf.build_monthly_zip(final_result, renderer=args.renderer, parallel=not args.serial_zip)
+    if not args.serial_zip:
+        # pemanasan: worker process dibuat sekali per proses aplikasi, bukan per ZIP
+        list(absensi_pdf._get_pool().map(abs, range(os.cpu_count() or 1)))
+    stage("monthly_zip", monthly_zip, final_result["Tanggal"].nunique(), "pdf", repeat=1)
+
+    return {"file": fname, "bytes": len(file_bytes), "punches": len(raw),
+            "employee_days": n_days, "bytes_per_punch": round(bytes_per_punch, 1),
+            "bytes_per_employee_day": round(bytes_per_day, 1), "stages": stages}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current, previous):
+    print(f"\nPerbandingan dengan {previous['meta'].get('commit')} ({previous['meta'].get('created')}):")
+    keys = ("employees", "days", "punches_per_day", "seed", "renderer", "serial_zip")
+    if any(current["meta"]["params"].get(k) != previous["meta"]["params"].get(k) for k in keys):
+        print("  peringatan: parameter data/renderer berbeda, angka tidak sebanding langsung")
+    prev_runs = {r["format"]: r for r in previous["runs"]}
+    for run in current["runs"]:
+        prev = prev_runs.get(run["format"])
+        if prev is None:
+            continue
+        print(f"  [{run['format']}]")
+        for name, st in run["stages"].items():
+            old = prev["stages"].get(name)
+            if not old or not old["seconds"]:
+                continue
+            ratio = st["seconds"] / old["seconds"]
+            flag = "  <-- lebih lambat" if ratio > 1.1 else ""
+            print(f"  {name:<14} {old['seconds']:>9.3f} -> {st['seconds']:>9.3f} s  x{ratio:.2f}{flag}")
+        if prev.get("bytes_per_punch"):
+            print(f"  {'B/punch':<14} {prev['bytes_per_punch']:>9.1f} -> {run['bytes_per_punch']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per tahap pipeline absensi.")
+    parser.add_argument("--employees", type=int, default=450)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--punches-per-day", type=float, default=2.2)
+    parser.add_argument("--format", nargs="+", choices=["csv", "xlsx", "xls"], default=["csv"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="ulangan per tahap (diambil yang tercepat)")
+    parser.add_argument("--renderer", choices=["platypus", "canvas"], default=None)
+    parser.add_argument("--serial-zip", action="store_true", help="render ZIP bulanan tanpa process pool")
+    parser.add_argument("--no-memory", action="store_true", help="lewati pengukuran memori (tracemalloc)")
+    parser.add_argument("-o", "--output", default=None, help="file JSON hasil (default: benchmarks/results/<waktu>.json)")
+    parser.add_argument("--compare", default=None, help="JSON hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    df = generate_absensi(args.employees, args.days, args.punches_per_day, seed=args.seed)
+    master = core.MasterStore(os.path.join(ROOT, core.MASTER_PATH)).get()
+    print(f"{len(df)} absen, {args.employees} pekerja, {args.days} hari")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.format:
+            skip = xls_skip_reason(len(df)) if fmt == "xls" else None
+            if skip:
+                print(f"[xls] dilewati: {skip}")
+                continue
+            path = write_absensi(df, os.path.join(tmp, f"absen.{fmt}"))
+            print(f"[{fmt}] {os.path.getsize(path) / 1e6:.1f} MB")
+            run = run_stages(path, master, args)
+            run["format"] = fmt
+            runs.append(run)
+
+    result = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "runs": runs,
+    }
+    out = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nHasil disimpan ke {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
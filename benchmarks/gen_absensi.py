@@ -0,0 +1,209 @@
+# benchmarks/gen_absensi.py
+# Pembuat data absensi mentah sintetis (export mesin fingerprint) untuk benchmark.
+#
+#   python benchmarks/gen_absensi.py --employees 2000 --days 31 --format xlsx -o absen.xlsx
+#
+# Hasilnya bisa langsung dibaca clean_and_normalize: kolom No.ID / Nama /
+# Tgl/Waktu / Lokasi ID, Lokasi ID 2 = masuk dan 1 = pulang. Isinya dibuat mirip
+# data asli: format tanggal campur, shift 3 yang pulang keesokan harinya,
+# ejaan nama yang berbeda-beda, absen ganda dan absen pulang yang terlewat.
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xlwt  # opsional (requirements-dev.txt): pandas tidak lagi bisa menulis .xls
+except ImportError:
+    xlwt = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MASTER_PATH = os.path.join(ROOT, "MasterData.csv")
+
+COLUMNS = ["No.ID", "Nama", "Tgl/Waktu", "Lokasi ID"]
+LOKASI_MASUK, LOKASI_PULANG = 2, 1
+
+# format tanggal yang muncul di export mesin (titik sebagai pemisah jam paling umum)
+TIMESTAMP_FORMATS = ["%d/%m/%Y %H.%M.%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M"]
+TIMESTAMP_WEIGHTS = [0.85, 0.07, 0.05, 0.03]
+
+# jam mulai shift 1/2/3; absen masuk ~ 0-60 menit sebelum mulai
+SHIFT_STARTS = np.array([7, 15, 23])
+XLS_MAX_ROWS = 65535
+XLS_MISSING = "Menulis .xls butuh paket xlwt (pip install -r requirements-dev.txt)"
+
+NAMA_DEPAN = ["Agus", "Budi", "Dedi", "Eko", "Hendra", "Joko", "Mochamad", "Nanang", "Rudi", "Slamet",
+              "Sugeng", "Suparman", "Teguh", "Wahyu", "Yusuf", "Ahmad", "Bambang", "Dimas", "Fajar", "Rizky"]
+NAMA_BELAKANG = ["Saputra", "Santoso", "Hidayat", "Prasetyo", "Wibowo", "Kurniawan", "Setiawan",
+                 "Susanto", "Nugroho", "Bahri", "Purnomo", "Firmansyah", "Hartono", "Gunawan"]
+
+
+def employees_from_master(n, rng, master_path=MASTER_PATH):
+    """n pekerja (ID, Nama): diambil dari MasterData.csv, sisanya dibuat acak."""
+    ids, names, next_id = [], [], 1
+    if master_path and os.path.exists(master_path):
+        master = pd.read_csv(master_path, sep=";").dropna(subset=["ID", "NAMA"])
+        master_ids = pd.to_numeric(master["ID"], errors="coerce")
+        next_id = int(master_ids.max()) + 1 if master_ids.notna().any() else 1
+        take = master.sample(min(n, len(master)), random_state=int(rng.integers(1 << 31)))
+        ids = take["ID"].astype(str).tolist()
+        names = take["NAMA"].astype(str).str.strip().tolist()
+    while len(ids) < n:
+        ids.append(str(next_id))
+        names.append(f"{rng.choice(NAMA_DEPAN)} {rng.choice(NAMA_BELAKANG)}")
+        next_id += 1
+    return pd.DataFrame({"ID": ids, "Nama": names})
+
+
+def spelling_variant(name, rng):
+    """Satu variasi ejaan: huruf besar semua, spasi ganda, atau satu huruf vokal hilang."""
+    kind = rng.integers(3)
+    if kind == 0:
+        return name.upper()
+    if kind == 1:
+        return name.replace(" ", "  ", 1) + " "
+    vowels = [i for i, ch in enumerate(name) if ch.lower() in "aiueo" and i > 0]
+    if not vowels:
+        return name.lower()
+    i = vowels[rng.integers(len(vowels))]
+    return name[:i] + name[i + 1:]
+
+
+def generate_absensi(employees=450, days=31, punches_per_day=2.2, start="2024-01-01",
+                     presence=0.8, missing_out=0.08, name_variants=0.03, mixed_formats=True,
+                     seed=0, master_path=MASTER_PATH):
+    """DataFrame absensi mentah dengan kolom COLUMNS.
+
+    ``punches_per_day`` adalah rata-rata absen per pekerja per hari hadir (minimal
+    ~2: masuk + pulang); kelebihannya menjadi absen ganda beberapa menit setelah
+    absen aslinya.
+    """
+    rng = np.random.default_rng(seed)
+    emp = employees_from_master(employees, rng, master_path)
+
+    # satu baris per (pekerja, hari hadir)
+    n_emp = len(emp)
+    day_idx = np.repeat(np.arange(days), n_emp)
+    emp_idx = np.tile(np.arange(n_emp), days)
+    hadir = rng.random(len(day_idx)) < presence
+    day_idx, emp_idx = day_idx[hadir], emp_idx[hadir]
+    n = len(day_idx)
+
+    # shift tetap per pekerja dengan sedikit rotasi
+    base_shift = rng.integers(0, 3, n_emp)
+    shift = np.where(rng.random(n) < 0.1, rng.integers(0, 3, n), base_shift[emp_idx])
+
+    base = pd.Timestamp(start).normalize()
+    day_start = base + pd.to_timedelta(day_idx, unit="D")
+    masuk = day_start + pd.to_timedelta(SHIFT_STARTS[shift] * 3600 - rng.integers(0, 3600, n), unit="s")
+    # shift 3 masuk 22:xx lalu pulang 07:xx keesokan harinya
+    pulang = masuk + pd.to_timedelta(8 * 3600 + rng.integers(1800, 5400, n), unit="s")
+
+    ada_pulang = rng.random(n) >= missing_out
+    times = [masuk, pulang[ada_pulang]]
+    lokasi = [np.full(n, LOKASI_MASUK), np.full(int(ada_pulang.sum()), LOKASI_PULANG)]
+    who = [emp_idx, emp_idx[ada_pulang]]
+
+    # absen ganda: ulangi absen yang sudah ada beberapa detik/menit kemudian
+    n_punch = n + int(ada_pulang.sum())
+    extra = int(max(0.0, punches_per_day * n - n_punch))
+    if extra:
+        src = rng.integers(0, n_punch, extra)
+        all_times = np.concatenate([t.to_numpy() for t in times])
+        times.append(pd.DatetimeIndex(all_times[src]) + pd.to_timedelta(rng.integers(5, 600, extra), unit="s"))
+        lokasi.append(np.concatenate(lokasi)[src])
+        who.append(np.concatenate(who)[src])
+
+    ts = pd.DatetimeIndex(np.concatenate([t.to_numpy() for t in times]))
+    who = np.concatenate(who)
+    df = pd.DataFrame({
+        "No.ID": emp["ID"].to_numpy()[who],
+        "Nama": emp["Nama"].to_numpy()[who],
+        "Tgl/Waktu": ts,
+        "Lokasi ID": np.concatenate(lokasi),
+    })
+
+    # ejaan nama berbeda pada sebagian absen
+    if name_variants > 0:
+        pick = np.flatnonzero(rng.random(len(df)) < name_variants)
+        df.loc[pick, "Nama"] = [spelling_variant(nm, rng) for nm in df["Nama"].to_numpy()[pick]]
+
+    # urut waktu seperti export mesin, lalu ubah timestamp jadi teks
+    df = df.sort_values("Tgl/Waktu", kind="stable").reset_index(drop=True)
+    if mixed_formats:
+        fmt_idx = rng.choice(len(TIMESTAMP_FORMATS), len(df), p=TIMESTAMP_WEIGHTS)
+    else:
+        fmt_idx = np.zeros(len(df), dtype=int)
+    text = pd.Series("", index=df.index, dtype=object)
+    for i, fmt in enumerate(TIMESTAMP_FORMATS):
+        mask = fmt_idx == i
+        if mask.any():
+            text[mask] = df.loc[mask, "Tgl/Waktu"].dt.strftime(fmt)
+    df["Tgl/Waktu"] = text
+    return df[COLUMNS]
+
+
+def write_absensi(df, path):
+    """Tulis ke .csv (pemisah ;), .xlsx atau .xls sesuai ekstensi path."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        df.to_csv(path, sep=";", index=False)
+    elif ext == ".xlsx":
+        df.to_excel(path, index=False, engine="openpyxl")
+    elif ext == ".xls":
+        _write_xls(df, path)
+    else:
+        raise ValueError(f"Format tidak didukung: {ext} (gunakan .csv .xlsx .xls)")
+    return path
+
+
+def xls_skip_reason(rows):
+    """Alasan .xls tidak bisa dibuat untuk ``rows`` baris (None bila bisa)."""
+    if xlwt is None:
+        return XLS_MISSING
+    if rows > XLS_MAX_ROWS:
+        return f"{rows} baris melebihi batas {XLS_MAX_ROWS}"
+    return None
+
+
+def _write_xls(df, path):
+    if xlwt is None:
+        raise RuntimeError(XLS_MISSING)
+    if len(df) > XLS_MAX_ROWS:
+        raise ValueError(f".xls maksimal {XLS_MAX_ROWS} baris data, diminta {len(df)}")
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("Sheet1")
+    for c, col in enumerate(df.columns):
+        sheet.write(0, c, col)
+    for r, row in enumerate(df.itertuples(index=False), start=1):
+        for c, val in enumerate(row):
+            sheet.write(r, c, val.item() if isinstance(val, np.generic) else val)
+    book.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buat file absensi mentah sintetis.")
+    parser.add_argument("-o", "--output", default=None, help="file output (default: absen_sintetis.<format>)")
+    parser.add_argument("--format", choices=["csv", "xlsx", "xls"], default="csv")
+    parser.add_argument("--employees", type=int, default=450)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--punches-per-day", type=float, default=2.2, help="rata-rata absen per pekerja per hari hadir")
+    parser.add_argument("--start", default="2024-01-01", help="tanggal pertama (YYYY-MM-DD)")
+    parser.add_argument("--name-variants", type=float, default=0.03, help="proporsi absen dengan ejaan nama berbeda")
+    parser.add_argument("--single-format", action="store_true", help="semua timestamp memakai format yang sama")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.format == "xls" and xlwt is None:
+        parser.error(XLS_MISSING)
+
+    df = generate_absensi(args.employees, args.days, args.punches_per_day, args.start,
+                          name_variants=args.name_variants, mixed_formats=not args.single_format,
+                          seed=args.seed)
+    path = write_absensi(df, args.output or f"absen_sintetis.{args.format}")
+    print(f"{len(df)} baris -> {path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+# tests/test_batch.py
+# CLI membaca master lewat read_master_table (jalur yang sama dengan upload di
+# UI) dan memuatnya sekali per proses, bukan sekali per partisi.
+import os
+
+import pandas as pd
+
+import absensi_batch
+import absensi_core as core
+from test_master_upload import make_xlsx
+
+
+def test_master_loaded_once_per_process(tmp_path, monkeypatch):
+    path = tmp_path / "master.xlsx"
+    path.write_bytes(make_xlsx())
+    calls = []
+    read = core.read_master_table
+    monkeypatch.setattr(core, "read_master_table", lambda *a: calls.append(a[1]) or read(*a))
+    monkeypatch.setattr(absensi_batch, "_master_cache", {})
+
+    first = absensi_batch.load_master(str(path))
+    assert absensi_batch.load_master(str(path)) is first
+    assert calls == ["master.xlsx"]
+    assert first.status_for(pd.Series(["105"])).tolist() == ["PKWT"]
+
+    # file master diganti: dimuat ulang
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert absensi_batch.load_master(str(path)) is not first
+    assert len(calls) == 2
@@ -0,0 +1,73 @@
+# tests/test_diag.py
+# Memori dicatat sebagai puncak per tahap (termasuk alokasi sementara di dalam
+# tahap), bukan puncak seumur proses; cProfile hanya berjalan bila diminta,
+# di thread job yang menjalankan pipeline.
+import sys
+import time
+
+import numpy as np
+import pytest
+
+import absensi_diag
+from absensi_jobs import JobRunner
+from absensi_jobs import JobRunner
+
+
+def wait(job):
+    for _ in range(500):
+        if job.done:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job tidak selesai")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RSS dibaca dari /proc")
+def test_stage_records_transient_peak():
+    diag = absensi_diag.start()
+    with absensi_diag.stage("luar"):
+        with absensi_diag.stage("besar"):
+            # dialokasikan lalu dibebaskan di dalam tahap: selisih awal/akhir = 0
+            data = np.ones(64 * 1024 * 1024 // 8)
+            time.sleep(0.05)
+            del data
+        with absensi_diag.stage("kecil"):
+            pass
+    rec = {r["stage"]: r for r in diag.records()}
+    assert rec["luar/besar"]["peak_mb"] >= 60
+    assert rec["luar/kecil"]["peak_mb"] < 8
+    # puncak tahap anak ikut terhitung di tahap induk
+    assert rec["luar"]["peak_mb"] >= 60
+
+
+def test_profile_only_when_enabled(tmp_path):
+    path = tmp_path / "profil.prof"
+    diag = absensi_diag.start()
+    with absensi_diag.profile_run(str(path), enabled=False):
+        pass
+    assert not path.exists() and diag.profile_text is None
+    with absensi_diag.profile_run(str(path)):
+        pass
+    assert path.exists() and diag.profile_text
+
+
+def test_profiled_job_covers_worker_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(absensi_diag, "PROFILE_PATH", str(tmp_path / "profil.prof"))
+    runner = JobRunner(max_workers=1)
+
+    def pipeline_kerja(job):
+        return sum(range(1000))
+
+    job = runner.submit("k", pipeline_kerja)
+    wait(job)
+    assert job.diag.profile_text is None
+    # permintaan profil memaksa job baru; fungsi job ikut terprofil di thread pekerja
+    job = runner.resubmit("k", pipeline_kerja, profile=True)
+    wait(job)
+    assert "pipeline_kerja" in job.diag.profile_text
+    assert (tmp_path / "profil.prof").exists()
+
+
+def test_env_profiles_one_run_once(monkeypatch):
+    monkeypatch.setattr(absensi_diag, "_profile_pending", True)
+    assert absensi_diag.take_profile_request()
+    assert not absensi_diag.take_profile_request()
@@ -0,0 +1,42 @@
+# tests/test_jobs.py
+# Job dengan kunci sama dipakai ulang, kecuali job yang gagal: submit
+# berikutnya harus menjalankannya lagi. Job selesai kedaluwarsa setelah TTL.
+import time
+from datetime import timedelta
+
+from absensi_jobs import JobRunner
+
+
+def wait(job):
+    for _ in range(500):
+        if job.done:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job tidak selesai")
+
+
+def test_failed_job_is_retried():
+    runner = JobRunner(max_workers=1)
+    calls = []
+
+    def flaky(job):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("disk penuh")
+        return "ok"
+
+    first = wait(runner.submit("k", flaky))
+    assert first.state == "gagal"
+    second = wait(runner.submit("k", flaky))
+    assert second is not first and second.result == "ok"
+    # job yang berhasil dipakai ulang tanpa menjalankan fn lagi
+    assert runner.submit("k", flaky) is second
+    assert len(calls) == 2
+
+
+def test_finished_jobs_expire():
+    runner = JobRunner(max_workers=1, ttl=timedelta(minutes=30))
+    job = wait(runner.submit("k", lambda job: "ok"))
+    assert runner.get("k") is job
+    job.finished -= timedelta(hours=1)
+    assert runner.get("k") is None
@@ -0,0 +1,39 @@
+# tests/test_load_absensi.py
+# CSV besar dibaca per chunk: hasil gabungan harus tetap bertipe ringkas
+# (categorical) dan sama persis dengan pembacaan satu chunk.
+import pandas as pd
+import pytest
+
+import absensi_core as core
+
+
+def make_csv(rows=600):
+    lines = ["No.ID;Nama;Tgl/Waktu;Lokasi ID"]
+    for i in range(rows):
+        # nama/ID berganti tiap 25 baris supaya kategori tiap chunk berbeda
+        w = i // 25
+        lines.append(f"{100 + w}; Pekerja {w} ;{1 + i % 28:02d}/01/2024 07.{i % 60:02d}.00;{1 + i % 2}")
+    return "\n".join(lines).encode("utf-8")
+
+
+@pytest.fixture
+def csv_bytes():
+    return make_csv()
+
+
+def test_chunked_csv_keeps_categorical_dtypes(csv_bytes, monkeypatch):
+    single = core.load_absensi(csv_bytes, "absen.csv")
+    monkeypatch.setattr(core, "CSV_CHUNK_ROWS", 100)
+    chunked = core.load_absensi(csv_bytes, "absen.csv")
+
+    for col in ("Nama", "ID"):
+        assert isinstance(chunked[col].dtype, pd.CategoricalDtype), col
+    assert chunked["Detik"].dtype == "int32"
+    pd.testing.assert_frame_equal(single.reset_index(drop=True), chunked.reset_index(drop=True))
+
+
+def test_chunked_csv_is_not_larger(csv_bytes, monkeypatch):
+    single = core.load_absensi(csv_bytes, "absen.csv")
+    monkeypatch.setattr(core, "CSV_CHUNK_ROWS", 100)
+    chunked = core.load_absensi(csv_bytes, "absen.csv")
+    assert chunked.memory_usage(deep=True, index=False).sum() <= single.memory_usage(deep=True, index=False).sum() * 1.05
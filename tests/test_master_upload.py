@@ -0,0 +1,35 @@
+# tests/test_master_upload.py
+# Master Excel yang diunggah disimpan utuh: jalur Excel cepat hanya mencari
+# baris header, kolom tambahan milik HR tidak boleh terbuang.
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+
+import absensi_core as core
+
+
+def make_xlsx():
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Daftar Pekerja Outsourcing"])
+    ws.append(["ID", "NAMA", "STATUS", "KEGIATAN", "Alamat", None, "Tgl Masuk"])
+    for i in range(20):
+        ws.append([100 + i, f"Pekerja {i}", "PKWT", "Mandor", f"Jl. Raya {i}", None, f"2023-01-{i + 1:02d}"])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_xlsx_master_keeps_every_column(tmp_path):
+    data = make_xlsx()
+    master_df = core.read_master_table(data, "master.xlsx")
+    assert list(master_df.columns) == ["ID", "NAMA", "STATUS", "KEGIATAN", "Alamat", "Unnamed: 5", "Tgl Masuk"]
+    pd.testing.assert_frame_equal(master_df, pd.read_excel(io.BytesIO(data), header=1))
+
+    store = core.MasterStore(str(tmp_path / "MasterData.csv"))
+    index = store.save(master_df)
+    saved = core.read_default_master(store.path)
+    assert list(saved.columns) == list(master_df.columns)
+    assert saved["Alamat"].tolist() == master_df["Alamat"].tolist()
+    assert index.status_for(pd.Series(["105"])).tolist() == ["PKWT"]
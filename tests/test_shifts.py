@@ -0,0 +1,59 @@
+# tests/test_shifts.py
+# encode_shifts_batch dibandingkan dengan versi skalar lama (per baris,
+# datetime.time) yang dipakai sebelum pengkodean shift divektorkan.
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from absensi_core import encode_shifts_batch
+
+BASE = datetime(2024, 1, 15)
+
+
+def overlaps(a_start, a_end, b_start, b_end, min_minutes=60):
+    latest_start = max(a_start, b_start)
+    earliest_end = min(a_end, b_end)
+    delta = (earliest_end - latest_start).total_seconds() / 60.0
+    return delta >= min_minutes
+
+
+def encode_shifts(t_in, t_out, shift_hours=8, tolerance_minutes=60):
+    if t_in is None and t_out is None:
+        return None, None, None
+    base_date = BASE.date()
+    start = datetime.combine(base_date, t_in) if t_in else None
+    end = datetime.combine(base_date, t_out) if t_out else None
+    if start is None and end is not None:
+        start = end - timedelta(hours=shift_hours)
+    if end is None and start is not None:
+        end = start + timedelta(hours=shift_hours)
+    if end < start:
+        end += timedelta(days=1)
+    windows = [(datetime.combine(base_date, time(a)), datetime.combine(base_date, time(b)) + timedelta(days=d))
+               for a, b, d in ((7, 15, 0), (15, 23, 0), (23, 7, 1))]
+    s = [1 if overlaps(start, end, a, b, min_minutes=tolerance_minutes) else 0 for a, b in windows]
+    if s == [0, 0, 0]:
+        diffs = [abs((start - (a + (b - a) / 2)).total_seconds()) for a, b in windows]
+        s[diffs.index(min(diffs))] = 1
+    if t_in is None and t_out is not None and t_out < time(7, 0):
+        s = [0, 0, 1]
+    return tuple(s)
+
+
+def as_time(sec):
+    if np.isnan(sec):
+        return None
+    return (BASE + timedelta(seconds=float(sec))).time()
+
+
+def test_batch_matches_scalar_oracle():
+    # semua kombinasi jam masuk/keluar per 20 menit, ditambah kosong
+    grid = np.append(np.arange(0, 86400, 1200, dtype="float64"), np.nan)
+    in_sec, out_sec = (a.ravel() for a in np.meshgrid(grid, grid))
+    got = encode_shifts_batch(in_sec, out_sec)
+    for i, (a, b) in enumerate(zip(in_sec, out_sec)):
+        expected = encode_shifts(as_time(a), as_time(b))
+        if expected[0] is None:
+            assert np.isnan(got[i]).all()
+        else:
+            assert tuple(got[i].astype(int)) == expected, (a, b)
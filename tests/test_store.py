@@ -0,0 +1,31 @@
+# tests/test_store.py
+# Mode arsip harus menghasilkan partisi (bulan x site) yang sama dengan
+# pemrosesan langsung, termasuk upload yang mencakup lebih dari satu bulan.
+import absensi_core as core
+from absensi_store import PunchStore
+
+
+def make_csv():
+    lines = ["No.ID;Nama;Tgl/Waktu;Lokasi ID;Plant"]
+    for site, ids in (("Plant A", range(100, 110)), ("Plant B", range(200, 205))):
+        for bulan, hari in (("01", 31), ("02", 3)):
+            for d in range(1, hari + 1):
+                for i in ids:
+                    lines.append(f"{i};Pekerja {i};{d:02d}/{bulan}/2024 07.0{i % 10}.00;2;{site}")
+                    lines.append(f"{i};Pekerja {i};{d:02d}/{bulan}/2024 15.1{i % 10}.00;1;{site}")
+    return "\n".join(lines).encode("utf-8")
+
+
+def test_archive_matches_direct_processing(tmp_path):
+    df_clean = core.load_absensi(make_csv(), "absen.csv")
+    direct = core.split_partitions(core.process_absensi(df_clean.copy(), None))
+
+    store = PunchStore(str(tmp_path / "arsip.sqlite"))
+    arsip = store.append(df_clean, "upload-1")
+    assert arsip["bulan"] == ["2024-01", "2024-02"]
+    archived = core.split_partitions(store.month_result(arsip["bulan"], None))
+
+    assert [label for label, _ in archived] == [label for label, _ in direct]
+    for (_, a), (_, b) in zip(archived, direct):
+        assert len(a) == len(b)
+        assert a["Shift1"].sum() == b["Shift1"].sum()